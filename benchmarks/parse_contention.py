@@ -0,0 +1,71 @@
+"""Throughput of concurrent `Project.parse` calls for a loaded model, with the
+locked path every request used to take and with the lock-free fast path.
+
+Run from the repository root: python benchmarks/parse_contention.py"""
+
+import argparse
+import os
+import sys
+import time
+from threading import Barrier, Thread
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "nlu"))
+
+from overrides import monkey_patch  # noqa: E402
+monkey_patch()
+from rasa_nlu.project import Project  # noqa: E402
+
+
+def locked_parse(self, text, time=None, requested_model_name=None, request_params=None):
+    # Project.parse before the fast path
+    self._begin_read()
+
+    model_name = self._dynamic_load_model(requested_model_name)
+
+    self._loader_lock.acquire()
+    try:
+        if not self._models.get(model_name):
+            interpreter = self._interpreter_for_model(model_name)
+            self._models[model_name] = interpreter
+    finally:
+        self._loader_lock.release()
+
+    response = self._models[model_name].parse(text, time, request_params=request_params)
+    response['project'] = self._project
+    response['model'] = model_name
+
+    self._end_read()
+
+    return response
+
+
+def run(parse, project, threads, requests):
+    barrier = Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(requests):
+            parse(project, "hello there", None, None, {})
+
+    workers = [Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.time()
+    for w in workers:
+        w.join()
+    return threads * requests / (time.time() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000, help="parse requests per thread")
+    args = parser.parse_args()
+
+    project = Project(project="default")
+    print("{:>8} {:>14} {:>14} {:>8}".format("threads", "locked req/s", "fast req/s", "gain"))
+    for threads in args.threads:
+        locked = run(locked_parse, project, threads, args.requests)
+        fast = run(Project.parse, project, threads, args.requests)
+        print("{:>8} {:>14.0f} {:>14.0f} {:>7.2f}x".format(threads, locked, fast, fast / locked))
@@ -0,0 +1,3 @@
+# set in a message by components whose output must not be cached by the
+# server (see overrides/response_cache.py), e.g. times relative to now
+UNCACHEABLE = "uncacheable"
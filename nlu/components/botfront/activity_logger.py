@@ -3,23 +3,56 @@ from typing import Any
 from rasa_nlu.components import Component
 from rasa_nlu.training_data import Message
 
-from requests_futures.sessions import FuturesSession
+from .log_shipper import LogShipper
 
 
 class ActivityLogger(Component):
     name = 'components.botfront.activity_logger.ActivityLogger'
+
+    # skipped by the warm-up parses of a model when it is loaded
+    network_bound = True
+
+    # also processes the responses reused from the response cache
+    side_effects = True
+
     defaults = {
         'url': '0.0.0.0',
+        # records are posted from a background thread shared by the models
+        # logging to the same url, one by one as JSON objects
+        'batch_size': 1,
+        # opt-in batching: with a `batch_size` larger than 1, records are
+        # posted as JSON lists of up to `batch_size` records, at least every
+        # `flush_interval` seconds, to `batch_url` (defaults to `url`)
+        'batch_url': None,
+        'flush_interval': 1.0,
+        # records queued beyond this are dropped
+        'max_queue': 10000,
+        'max_retries': 3,
+        # seconds, doubled after each failed attempt
+        'backoff': 0.5,
+        # directory where records are kept while Botfront cannot be reached
+        'spool_dir': None,
+        # seconds between attempts to post the spooled records once
+        # Botfront could not be reached
+        'retry_interval': 30.0,
     }
 
     def __init__(self, component_config=None):
         super(ActivityLogger, self).__init__(component_config)
         assert 'url' in component_config, 'You must specify the url to use the ActivityLogger component'
+        self.shipper = LogShipper.for_url(self.component_config['url'],
+                                          batch_size=self.component_config['batch_size'],
+                                          batch_url=self.component_config['batch_url'],
+                                          flush_interval=self.component_config['flush_interval'],
+                                          max_queue=self.component_config['max_queue'],
+                                          max_retries=self.component_config['max_retries'],
+                                          backoff=self.component_config['backoff'],
+                                          spool_dir=self.component_config['spool_dir'],
+                                          retry_interval=self.component_config['retry_interval'])
 
     def process(self, message, **kwargs):
         # type: (Message, **Any) -> None
 
-        session = FuturesSession()
         params = kwargs.get('request_params', None)
         if params is None:
             return
@@ -30,7 +63,7 @@ class ActivityLogger(Component):
         output = self._message_dict(message)
         output['modelId'] = params.get('model')
 
-        session.post(self.component_config.get('url'), json=output)
+        self.shipper.submit(output)
 
     @staticmethod
     def _message_dict(message):
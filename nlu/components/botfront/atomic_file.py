@@ -0,0 +1,27 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+from typing import Iterator
+from typing import Text
+
+
+@contextmanager
+def atomic_path(path):
+    # type: (Text) -> Iterator[Text]
+    """Path of a new temporary file next to `path`, which replaces `path` once written.
+
+    Concurrent writers each write their own temporary file, and readers
+    only ever see a complete version of the file."""
+
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=name + ".", suffix=".tmp")
+    os.close(fd)
+    os.chmod(tmp_path, 0o644)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,70 @@
+import time
+from threading import Lock
+
+from typing import Any
+from typing import Dict
+from typing import Text
+
+
+class CircuitBreaker(object):
+    """Stops calling a failing service for a while.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    `allow` returns False for `reset_timeout` seconds. Then a single trial call
+    is let through: its success closes the circuit, its failure opens it again."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        # type: (int, float, Any) -> None
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.rejected = 0
+        self._clock = clock
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._lock = Lock()
+
+    @property
+    def state(self):
+        # type: () -> Text
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        # type: () -> bool
+        """Whether a call should be attempted, to be followed by `success` or `failure`."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                # the trial call; others are rejected until it completes
+                self._state = self.HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._state = self.CLOSED
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def stats(self):
+        # type: () -> Dict[Text, Any]
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
@@ -11,8 +11,20 @@ from rasa_nlu.extractors import EntityExtractor
 from rasa_nlu.model import Metadata
 from rasa_nlu.training_data import Message
 
+from . import UNCACHEABLE
+from . import duckling_local
+from .circuit_breaker import CircuitBreaker
+from .http_session import pooled_session
+from .lru_cache import LRUCache
+from .prefetch import Prefetcher
+
 logger = logging.getLogger(__name__)
 
+# length in seconds of the grains of duckling time values, the coarser ones
+# being resolved within a day
+GRAIN_SECONDS = {"second": 1, "minute": 60, "hour": 3600}
+DAY_SECONDS = 86400
+
 
 def extract_value(match):
     if match["value"].get("type") == "interval":
@@ -35,6 +47,41 @@ def filter_irrelevant_matches(matches, requested_dimensions):
         return matches
 
 
+def _utc_offset(value):
+    """UTC offset in seconds of a duckling timestamp like 2019-03-01T00:00:00.000-05:00"""
+    if not value or value.endswith("Z"):
+        return 0
+    sign = -1 if value[-6] == "-" else 1
+    return sign * (int(value[-5:-3]) * 3600 + int(value[-2:]) * 60)
+
+
+def time_bucket(matches, reference_time):
+    """Span of reference times over which duckling resolves `matches` identically.
+
+    A time value only changes when the reference time crosses a boundary of
+    its grain in the requested timezone: "at 5pm" resolves to the same instant
+    for the whole hour, "tomorrow" for the whole day. Returns the length in
+    seconds and the UTC offset of the span, and the index of the span of
+    `reference_time` (in milliseconds), or None if no match is a time."""
+
+    grains = []
+    offset = None
+    for match in matches:
+        if match["dim"] != "time":
+            continue
+        value = match["value"]
+        for point in [value, value.get("from"), value.get("to")]:
+            if point and point.get("grain"):
+                grains.append(GRAIN_SECONDS.get(point["grain"], DAY_SECONDS))
+                if offset is None:
+                    offset = _utc_offset(point.get("value"))
+
+    if not grains:
+        return None
+    length = min(grains)
+    return length, offset, (reference_time // 1000 + offset) // length
+
+
 def convert_duckling_format_to_rasa(matches):
     extracted = []
 
@@ -53,11 +100,14 @@ def convert_duckling_format_to_rasa(matches):
     return extracted
 
 
-class DucklingHTTPExtractor(EntityExtractor):
+class DucklingHTTPExtractor(Prefetcher, EntityExtractor):
     """Searches for structured entites, e.g. dates, using a duckling server."""
 
     name = "components.botfront.duckling_http_extractor.DucklingHTTPExtractor"
 
+    # skipped by the warm-up parses of a model when it is loaded
+    network_bound = True
+
     provides = ["entities"]
 
     defaults = {
@@ -74,7 +124,36 @@ class DucklingHTTPExtractor(EntityExtractor):
 
         # timezone like Europe/Berlin
         # if not set the default timezone of Duckling is going to be used
-        "timezone": None
+        "timezone": None,
+
+        # seconds to wait for the connection to duckling and for its response
+        "connect_timeout": 1.0,
+        "read_timeout": 2.0,
+
+        # number of connections to duckling kept open
+        "pool_size": 10,
+
+        # after this many consecutive failed requests, duckling is not called
+        # for `reset_timeout` seconds and no duckling entity is extracted
+        "failure_threshold": 5,
+        "reset_timeout": 30.0,
+
+        # number of duckling responses cached by text, locale, timezone and
+        # dimensions, 0 to disable. Responses with a time are only reused
+        # for reference times within the same grain (same day, hour...)
+        "cache_size": 1000,
+        # seconds after which a cached response is requested again
+        "cache_ttl": 3600,
+
+        # start the request to duckling when the message enters the
+        # pipeline, while the other components process it
+        "prefetch": False,
+        "prefetch_workers": 4,
+
+        # parse numbers, ordinals, amounts of money, emails, urls and phone
+        # numbers in process when they can be, and only request the other
+        # dimensions from duckling
+        "local_dimensions": False,
     }
 
     def __init__(self,
@@ -83,6 +162,12 @@ class DucklingHTTPExtractor(EntityExtractor):
 
         super(DucklingHTTPExtractor, self).__init__(component_config)
         self.language = language
+        self.session = pooled_session(self.component_config["pool_size"])
+        self.circuit_breaker = CircuitBreaker(
+            self.component_config["failure_threshold"],
+            self.component_config["reset_timeout"])
+        self.cache = LRUCache(self.component_config["cache_size"],
+                              self.component_config["cache_ttl"])
 
     @classmethod
     def create(cls, config: RasaNLUModelConfig) -> 'DucklingHTTPExtractor':
@@ -106,32 +191,109 @@ class DucklingHTTPExtractor(EntityExtractor):
 
         return self.component_config.get("url")
 
-    def _payload(self, text, reference_time, timezone):
-        return {
+    def _payload(self, text, reference_time, timezone, dimensions=None):
+        payload = {
             "text": text,
             "locale": self._locale(),
             "tz": timezone,
             "reftime": reference_time
         }
+        if dimensions:
+            # duckling only runs the rules of the requested dimensions
+            payload["dims"] = simplejson.dumps(dimensions)
+        return payload
+
+    def _parse(self, text, reference_time, timezone):
+        """Matches parsed in process, and those of the other dimensions from duckling."""
+
+        dimensions = self.component_config.get("dimensions")
+        if self.component_config.get("local_dimensions"):
+            local_matches, resolved = duckling_local.parse(
+                text, self._locale(), dimensions)
+        else:
+            local_matches, resolved = [], set()
+
+        if not resolved:
+            remote_dimensions = dimensions
+        elif dimensions:
+            remote_dimensions = [d for d in dimensions if d not in resolved]
+            if not remote_dimensions:
+                return local_matches
+        else:
+            # all dimensions: the locally resolved ones are left out below
+            remote_dimensions = None
+
+        if self._url() is None:
+            logger.warning("Duckling HTTP component in pipeline, but no "
+                           "`url` configuration in the config "
+                           "file nor is `RASA_DUCKLING_HTTP_URL` "
+                           "set as an environment variable.")
+            return local_matches
+
+        remote_matches = [m for m in self._duckling_parse(
+            text, reference_time, timezone, remote_dimensions)
+            if m["dim"] not in resolved]
+        if not local_matches:
+            return remote_matches
+        return duckling_local.remove_subsumed(local_matches + remote_matches)
+
+    def _duckling_parse(self, text, reference_time, timezone, dimensions=None):
+        """Cached duckling matches, or the result of a new request."""
+
+        key = (text, self._locale(), timezone,
+               tuple(sorted(dimensions)) if dimensions else None)
+        cached = self.cache.get(key)
+        if cached is not None:
+            bucket, matches = cached
+            if bucket is None or time_bucket(matches, reference_time) == bucket:
+                return matches
+
+        matches = self._duckling_request(text, reference_time, timezone,
+                                         dimensions)
+        if matches is None:
+            return []
+        self.cache.set(key, (time_bucket(matches, reference_time), matches))
+        return matches
+
+    def _duckling_request(self, text, reference_time, timezone, dimensions=None):
+        """Sends the request to the duckling server and parses the result.
+
+        Returns None if duckling could not be reached or failed."""
 
-    def _duckling_parse(self, text, reference_time, timezone):
-        """Sends the request to the duckling server and parses the result."""
+        if not self.circuit_breaker.allow():
+            logger.debug("Duckling is unavailable, skipping the request.")
+            return None
 
         try:
-            payload = self._payload(text, reference_time, timezone)
+            payload = self._payload(text, reference_time, timezone, dimensions)
             headers = {"Content-Type": "application/x-www-form-urlencoded; "
                                        "charset=UTF-8"}
-            response = requests.post(self._url() + "/parse",
-                                     data=payload,
-                                     headers=headers)
+            response = self.session.post(
+                self._url() + "/parse",
+                data=payload,
+                headers=headers,
+                timeout=(self.component_config["connect_timeout"],
+                         self.component_config["read_timeout"]))
             if response.status_code == 200:
-                return simplejson.loads(response.text)
+                matches = simplejson.loads(response.text)
+                self.circuit_breaker.success()
+                return matches
             else:
+                if response.status_code >= 500:
+                    self.circuit_breaker.failure()
+                else:
+                    self.circuit_breaker.success()
                 logger.error("Failed to get a proper response from remote "
                              "duckling. Status Code: {}. Response: {}"
                              "".format(response.status_code, response.text))
-                return []
+                return None
+        except requests.exceptions.Timeout as e:
+            self.circuit_breaker.failure()
+            logger.error("Duckling http server did not respond in time. "
+                         "Error: {}".format(e))
+            return None
         except requests.exceptions.ConnectionError as e:
+            self.circuit_breaker.failure()
             logger.error("Failed to connect to duckling http server. Make sure "
                          "the duckling server is running and the proper host "
                          "and port are set in the configuration. More "
@@ -139,7 +301,21 @@ class DucklingHTTPExtractor(EntityExtractor):
                          "github: "
                          "https://github.com/facebook/duckling#quickstart "
                          "Error: {}".format(e))
-            return []
+            return None
+        except requests.exceptions.RequestException as e:
+            self.circuit_breaker.failure()
+            logger.error("Request to duckling http server failed. "
+                         "Error: {}".format(e))
+            return None
+        except Exception:
+            # every call let through by the breaker must be recorded, or a
+            # failed trial call would leave it half open for good
+            self.circuit_breaker.failure()
+            raise
+
+    def stats(self):
+        return {"cache": self.cache.stats(),
+                "circuit_breaker": self.circuit_breaker.stats()}
 
     @staticmethod
     def _timezone_from_config_or_request(component_config, timezone):
@@ -167,31 +343,37 @@ class DucklingHTTPExtractor(EntityExtractor):
                                 "duckling. Error: {}".format(reference_time, e))
         return int(time.time()) * 1000
 
+    def fetch_key(self, message: Message, **kwargs: Any):
+        params = kwargs.get('request_params') or {}
+        return (message.text, message.time, params.get("reference_time", None),
+                self._timezone_from_config_or_request(
+                    self.component_config, params.get("timezone", None)))
+
+    def fetch(self, key):
+        text, message_time, reference_time, timezone = key
+        reference_time = self._reference_time_from_message_or_request(
+            Message(text, time=message_time), reference_time)
+        return self._parse(text, reference_time, timezone)
+
     def process(self, message: Message, **kwargs: Any) -> None:
 
-        if self._url() is not None:
-            params = kwargs.get('request_params', None)
-            timezone = self._timezone_from_config_or_request(
-                self.component_config, params.get("timezone", None))
-            reference_time = self._reference_time_from_message_or_request(
-                message, params.get("reference_time", None))
-            matches = self._duckling_parse(message.text, reference_time,
-                                           timezone)
-            dimensions = self.component_config["dimensions"]
-            relevant_matches = filter_irrelevant_matches(matches, dimensions)
-            extracted = convert_duckling_format_to_rasa(relevant_matches)
-        else:
-            extracted = []
-            logger.warning("Duckling HTTP component in pipeline, but no "
-                           "`url` configuration in the config "
-                           "file nor is `RASA_DUCKLING_HTTP_URL` "
-                           "set as an environment variable.")
+        matches = self.fetched(message, **kwargs)
+        dimensions = self.component_config["dimensions"]
+        relevant_matches = filter_irrelevant_matches(matches, dimensions)
+        extracted = convert_duckling_format_to_rasa(relevant_matches)
 
         extracted = self.add_extractor_name(extracted)
         message.set("entities",
                     message.get("entities", []) + extracted,
                     add_to_output=True)
 
+        # times are resolved relative to now unless the request gives the reference
+        # time, the response must not be cached (see overrides/response_cache.py)
+        params = kwargs.get('request_params') or {}
+        if (message.time is None and params.get("reference_time") is None and
+                any(m["dim"] == "time" for m in relevant_matches)):
+            message.set(UNCACHEABLE, True)
+
     @classmethod
     def load(cls,
              model_dir: Text = None,
@@ -0,0 +1,247 @@
+"""In-process parsing of the simplest Duckling dimensions.
+
+Numbers, ordinals, amounts of money, emails, urls and phone numbers written
+with digits and symbols follow a handful of patterns, which are matched here
+with the same output as Duckling. When a message contains a form only
+Duckling understands (numbers in words, intervals of money...), or text the
+patterns match only partly ("1,5 euros"), the dimension is reported as
+unresolved and must be requested from Duckling."""
+
+import re
+
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Text
+from typing import Tuple
+
+# dimensions supported by duckling, requested when none are configured
+ALL_DIMENSIONS = ["amount-of-money", "credit-card-number", "distance", "duration", "email", "number", "ordinal",
+                  "phone-number", "quantity", "temperature", "time", "url", "volume"]
+
+# dimensions whose rules do not depend on the language
+UNIVERSAL_DIMENSIONS = ["email", "url", "phone-number"]
+
+# dimensions parsed in english
+ENGLISH_DIMENSIONS = ["number", "ordinal", "amount-of-money"] + UNIVERSAL_DIMENSIONS
+
+_NUMBER = r"(?:\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+)"
+
+NUMBER_PATTERN = re.compile(r"(?<![\d.,-])(-?)(" + _NUMBER + r")(?![\d])")
+
+ORDINAL_PATTERN = re.compile(r"(?<!\d)0*(\d+) ?(?:st|nd|rd|th)\b", re.IGNORECASE)
+
+EMAIL_PATTERN = re.compile(r"[\w._+-]+@[\w_-]+(?:\.[\w_-]+)+")
+
+URL_PATTERN = re.compile(r"(?:[a-zA-Z]+://)?(?:w{2,3}[0-9]*\.)?((?:[\w_-]+\.)+[a-z]{2,4})(?::\d+)?"
+                         r"(?:/[^?\s#]*)?(?:\?[^\s#]+)?(?:#[-,*=&a-z0-9]+)?")
+
+PHONE_PATTERN = re.compile(r"(?:\(?\+(\d{1,2})\)?[\s.-]*)?"
+                           r"(?=[-\d()\s.]{6,16}(?:\s*e?xt?\.?\s*\d{1,20})?(?:\D|$))"
+                           r"([\d(][-\d()\s.]{0,18}\d)"
+                           r"(?:\s*e?xt?\.?\s*(\d{1,20}))?")
+
+# currency symbols and words, and the unit duckling gives them
+CURRENCIES = {"$": "$", "dollar": "$", "dollars": "$", "usd": "USD",
+              "€": "EUR", "euro": "EUR", "euros": "EUR", "eur": "EUR",
+              "£": "£", "pound": "£", "pounds": "£", "gbp": "GBP"}
+
+_CURRENCY = r"(\$|€|£|usd|eur|gbp|dollars?|euros?|pounds?)"
+
+MONEY_PATTERNS = [
+    re.compile(r"(?<![\w$€£])" + _CURRENCY + r" ?(" + _NUMBER + r")(?![\d])", re.IGNORECASE),
+    re.compile(r"(?<![\d.,])(" + _NUMBER + r") ?" + _CURRENCY + r"(?!\w)", re.IGNORECASE),
+]
+
+# forms of the english dimensions only duckling resolves
+NUMBER_WORDS = re.compile(
+    r"\b(?:zero|nil|none|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|"
+    r"fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|fourty|fifty|sixty|seventy|eighty|"
+    r"ninety|hundreds?|thousands?|millions?|billions?|trillions?|dozens?|couple|pair|few|half|minus|negative|"
+    r"point|single|a lot|gross)\b|\d\s*[kmgb]\b|\d\s*/\s*\d|\d\s*-\s*\d|\d\s*e\s*-?\d",
+    re.IGNORECASE)
+
+ORDINAL_WORDS = re.compile(
+    r"\b(?:first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth|eleventh|twelfth|thirteenth|"
+    r"fourteenth|fifteenth|sixteenth|seventeenth|eighteenth|nineteenth|twentieth|thirtieth|fortieth|"
+    r"fiftieth|sixtieth|seventieth|eightieth|ninetieth|hundredth|thousandth|millionth|last)\b",
+    re.IGNORECASE)
+
+# currencies duckling knows besides the ones above
+OTHER_CURRENCIES = re.compile(
+    r"[¥₹¢₩₽฿₪₴]|\b(?:(?-i:(?!USD|EUR|GBP)[A-Z]{3})|bucks?|cents?|pennys?|pennies|pence|yen|rupees?|francs?|"
+    r"dirhams?|dinars?|riyals?|ringgits?|kronas?|kroners?|krones?|kronors?|rubles?|roubles?|pesos?|reais|"
+    r"reals?|rand|won|yuan|rmb|liras?|shekels?|sterling|quid|grand)\b",
+    re.IGNORECASE)
+
+# intervals and approximations of amounts ("between $10 and $20", "about $5k")
+MONEY_MODIFIERS = re.compile(
+    r"\b(?:between|from|under|below|less|more|over|above|most|least|about|around|approx\w*|exactly|"
+    r"precisely|upto)\b|\d\s*-\s*[\d$€£]|\d\s*[kmb]\b",
+    re.IGNORECASE)
+
+
+# text Duckling may read as a number, an ordinal or a currency: the patterns
+# above must match all of it for the dimension to be resolved in process
+NUMBER_CANDIDATE = re.compile(r"-?\.?\d(?:[\d.,]*\d)?")
+
+ORDINAL_CANDIDATE = re.compile(r"[\d.,]*\d ?(?:st|nd|rd|th)\w*", re.IGNORECASE)
+
+CURRENCY_CANDIDATE = re.compile(r"[$€£]|\b(?:usd|eur|gbp|dollars?|euros?|pounds?)\b", re.IGNORECASE)
+
+
+def _valid_range(text, start, end):
+    # type: (Text, int, int) -> bool
+    """Duckling only keeps matches not cut in the middle of a word or a number."""
+
+    def char_class(c):
+        if c.isalpha():
+            return "c"
+        if c.isdigit():
+            return "d"
+        return c
+
+    return ((start == 0 or char_class(text[start - 1]) != char_class(text[start])) and
+            (end == len(text) or char_class(text[end - 1]) != char_class(text[end])))
+
+
+def _number_value(text):
+    # type: (Text) -> Any
+    value = float(text.replace(",", ""))
+    return int(value) if value.is_integer() else value
+
+
+def _match(dim, start, end, text, value):
+    # type: (Text, int, int, Text, Dict[Text, Any]) -> Dict[Text, Any]
+    return {"body": text[start:end], "start": start, "end": end, "dim": dim, "latent": False, "value": value}
+
+
+def _numbers(text):
+    for m in NUMBER_PATTERN.finditer(text):
+        value = _number_value(m.group(2))
+        yield _match("number", m.start(), m.end(), text,
+                     {"value": -value if m.group(1) else value, "type": "value"})
+
+
+def _ordinals(text):
+    for m in ORDINAL_PATTERN.finditer(text):
+        yield _match("ordinal", m.start(), m.end(), text, {"value": int(m.group(1)), "type": "value"})
+
+
+def _amounts_of_money(text):
+    for i, pattern in enumerate(MONEY_PATTERNS):
+        for m in pattern.finditer(text):
+            currency, number = m.groups() if i == 0 else reversed(m.groups())
+            yield _match("amount-of-money", m.start(), m.end(), text,
+                         {"value": _number_value(number), "type": "value", "unit": CURRENCIES[currency.lower()]})
+
+
+def _emails(text):
+    for m in EMAIL_PATTERN.finditer(text):
+        yield _match("email", m.start(), m.end(), text, {"value": m.group()})
+
+
+def _urls(text):
+    for m in URL_PATTERN.finditer(text):
+        yield _match("url", m.start(), m.end(), text, {"value": m.group(), "domain": m.group(1).lower()})
+
+
+def _phone_numbers(text):
+    for m in PHONE_PATTERN.finditer(text):
+        prefix, number, extension = m.groups()
+        value = "".join(c for c in number if c.isdigit())
+        if prefix:
+            value = "(+{}) {}".format(int(prefix), value)
+        if extension:
+            value = "{} ext {}".format(value, int(extension))
+        yield _match("phone-number", m.start(), m.end(), text, {"value": value})
+
+
+def _spans(pattern, text):
+    # type: (Any, Text) -> List[Tuple[int, int]]
+    return [m.span() for m in pattern.finditer(text)]
+
+
+def _consumed(spans, boundaries, matches):
+    # type: (List[Tuple[int, int]], List[Tuple[int, int]], List[Dict[Text, Any]]) -> bool
+    """Whether each of the `spans` is inside a match, and no match starts or ends inside one of the `boundaries`."""
+
+    return (all(any(m["start"] <= start and end <= m["end"] for m in matches) for start, end in spans) and
+            not any(start < m["start"] < end or start < m["end"] < end
+                    for start, end in boundaries for m in matches))
+
+
+def _unresolved_numbers(text, matches):
+    numbers = _spans(NUMBER_CANDIDATE, text)
+    return NUMBER_WORDS.search(text) or not _consumed(numbers, numbers, matches)
+
+
+def _unresolved_ordinals(text, matches):
+    ordinals = _spans(ORDINAL_CANDIDATE, text)
+    return ORDINAL_WORDS.search(text) or not _consumed(ordinals, ordinals, matches)
+
+
+def _unresolved_amounts_of_money(text, matches):
+    return (OTHER_CURRENCIES.search(text) or (matches and MONEY_MODIFIERS.search(text)) or
+            not _consumed(_spans(CURRENCY_CANDIDATE, text), _spans(NUMBER_CANDIDATE, text), matches))
+
+
+def _unresolved_urls(text, matches):
+    # the domain of an email address is left to duckling's url rules
+    return "@" in text
+
+
+# parser of each dimension, and test of the forms it does not resolve
+PARSERS = {
+    "number": (_numbers, _unresolved_numbers),
+    "ordinal": (_ordinals, _unresolved_ordinals),
+    "amount-of-money": (_amounts_of_money, _unresolved_amounts_of_money),
+    "email": (_emails, None),
+    "url": (_urls, _unresolved_urls),
+    "phone-number": (_phone_numbers, None),
+}
+
+
+def local_dimensions(locale):
+    # type: (Optional[Text]) -> List[Text]
+    """Dimensions parsed in process for a duckling locale like en_US."""
+    if locale and locale.lower().startswith("en"):
+        return ENGLISH_DIMENSIONS
+    return UNIVERSAL_DIMENSIONS
+
+
+def parse(text, locale, dimensions=None):
+    # type: (Text, Optional[Text], Optional[Iterable[Text]]) -> Tuple[List[Dict[Text, Any]], Set[Text]]
+    """Duckling matches of the `dimensions` (all by default) parsed in process.
+
+    Also returns the dimensions that were resolved, the others still have to
+    be requested from duckling."""
+
+    requested = set(dimensions) if dimensions else set(ALL_DIMENSIONS)
+    matches = []
+    resolved = set()
+    for dim in local_dimensions(locale):
+        if dim not in requested:
+            continue
+        parser, unresolved = PARSERS[dim]
+        dim_matches = [m for m in parser(text) if _valid_range(text, m["start"], m["end"])]
+        if unresolved is not None and unresolved(text, dim_matches):
+            continue
+        resolved.add(dim)
+        matches.extend(dim_matches)
+    return remove_subsumed(matches), resolved
+
+
+def remove_subsumed(matches):
+    # type: (List[Dict[Text, Any]]) -> List[Dict[Text, Any]]
+    """Removes the matches strictly inside another of the same dimension, like duckling does.
+
+    Matches of different dimensions are all kept, e.g. the number of an amount of money."""
+
+    kept = [m for m in matches
+            if not any(o["dim"] == m["dim"] and o["start"] <= m["start"] and m["end"] <= o["end"] and
+                       o["end"] - o["start"] > m["end"] - m["start"] for o in matches)]
+    return sorted(kept, key=lambda m: (m["start"], m["end"]))
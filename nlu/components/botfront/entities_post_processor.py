@@ -0,0 +1,130 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+from rasa_nlu.components import Component
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Text
+
+from rasa_nlu.config import RasaNLUModelConfig
+from rasa_nlu.model import Metadata
+from rasa_nlu.training_data import Message
+
+logger = logging.getLogger(__name__)
+
+
+class EntitiesPostProcessor(Component):
+    """Merges Duckling entities into CRF ones, filters entities wrt intent and sweeps
+    entities, like `DucklingCrfMerger`, `EntitiesFilter` and `Sweeper` one after the other.
+
+    The rules are compiled to sets when the component is created, Duckling
+    entities are matched to the CRF ones containing them with a sweep over
+    both sorted by start, and the entities kept are collected in one pass."""
+
+    name = "components.botfront.entities_post_processor.EntitiesPostProcessor"
+
+    provides = ["entities"]
+
+    defaults = {
+        # CRF entity -> Duckling dimensions merged into it (`DucklingCrfMerger` "entities")
+        "merge": {},
+        # extractors of the entities merged into CRF ones, matched by prefix
+        "merge_extractors": ["ner_duckling"],
+        # intent -> entities allowed with it (`EntitiesFilter` "entities")
+        "intent_entities": {},
+        # extractors of the entities filtered wrt intent
+        "filter_extractors": ["ner_crf", "ner_duckling_http"],
+        # entities always removed (`Sweeper` "entity_names")
+        "sweep": [],
+    }
+
+    def __init__(self, component_config=None):
+        # type: (Optional[Dict[Text, Any]]) -> None
+
+        super(EntitiesPostProcessor, self).__init__(component_config)
+        self.merge = {crf: set(dims) for crf, dims in self.component_config["merge"].items()}
+        self.merge_extractors = tuple(self.component_config["merge_extractors"])
+        self.intent_entities = {intent: set(entities)
+                                for intent, entities in self.component_config["intent_entities"].items()}
+        self.filter_extractors = set(self.component_config["filter_extractors"])
+        self.sweep = set(self.component_config["sweep"])
+
+    @classmethod
+    def create(cls, config):
+        # type: (RasaNLUModelConfig) -> EntitiesPostProcessor
+
+        return EntitiesPostProcessor(config.for_component(cls.name, cls.defaults))
+
+    def _merged(self, entities):
+        # type: (List[Dict[Text, Any]]) -> set
+        """Merges Duckling entities into the first CRF entity containing them,
+        returns the indices of the merged Duckling entities."""
+
+        crf_entities = sorted(((e["start"], i, e) for i, e in enumerate(entities)
+                               if e["extractor"] == "ner_crf" and e["entity"] in self.merge),
+                              key=lambda c: c[0])
+        if not crf_entities:
+            return set()
+        duck_entities = sorted(((e["start"], i, e) for i, e in enumerate(entities)
+                                if e["extractor"].startswith(self.merge_extractors)),
+                               key=lambda d: d[0])
+
+        merged = set()
+        merges = {}  # CRF entity index -> (index, entity) of the last Duckling entity merged into it
+        active = []  # (index, entity) of the CRF entities starting before the current Duckling one
+        next_crf = 0
+        for start, index, duck_entity in duck_entities:
+            while next_crf < len(crf_entities) and crf_entities[next_crf][0] <= start:
+                active.append(crf_entities[next_crf][1:])
+                next_crf += 1
+            # CRF entities ending before this Duckling entity cannot contain the next ones either
+            active = [c for c in active if c[1]["end"] >= start]
+            containing = [c for c in active
+                          if c[1]["end"] >= duck_entity["end"] and duck_entity["entity"] in self.merge[c[1]["entity"]]]
+            if containing:
+                crf_index = min(c[0] for c in containing)
+                if merges.get(crf_index, (-1,))[0] < index:
+                    merges[crf_index] = (index, duck_entity)
+                merged.add(index)
+
+        # in message order, the last Duckling entity merged into a CRF one gives its value
+        for crf_index, (_, duck_entity) in merges.items():
+            entities[crf_index]["value"] = duck_entity["value"]
+            entities[crf_index]["additional_info"] = duck_entity.get("additional_info")
+        return merged
+
+    def process(self, message, **kwargs):
+        # type: (Message, **Any) -> None
+        entities = message.get("entities", [])
+        merged = self._merged(entities) if self.merge else set()
+
+        allowed = None
+        if self.intent_entities:
+            intent = message.get("intent")
+            if intent is None:
+                logger.warning("No intent found")
+            else:
+                allowed = self.intent_entities.get(intent["name"])
+
+        message.set("entities", [e for i, e in enumerate(entities)
+                                 if i not in merged and
+                                 e["entity"] not in self.sweep and
+                                 (allowed is None or e["entity"] in allowed or
+                                  e["extractor"] not in self.filter_extractors)])
+
+    @classmethod
+    def load(cls,
+             model_dir=None,  # type: Text
+             model_metadata=None,  # type: Metadata
+             cached_component=None,  # type: Optional[EntitiesPostProcessor]
+             **kwargs  # type: **Any
+             ):
+        # type: (...) -> EntitiesPostProcessor
+
+        component_config = model_metadata.for_component(cls.name)
+        return cls(component_config)
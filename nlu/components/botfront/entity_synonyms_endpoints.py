@@ -7,46 +7,162 @@ import os
 import warnings
 
 from builtins import str
+from threading import Lock
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Optional
 from typing import Text
 
 from rasa_nlu.extractors.entity_synonyms import EntitySynonymMapper
+from rasa_nlu.utils import read_json_file, write_json_to_file
+
+from .atomic_file import atomic_path
+from .synonym_store import load_synonyms, write_synonyms
+
+
+# (start, end, literal) of the values written in the text by `EntitySynonymBegin`
+REPLACEMENTS = "synonym_replacements"
+
+
+class CompactEntitySynonymMapper(EntitySynonymMapper):
+    """Entity synonym mapper persisting its synonyms in a sorted binary file.
+
+    The file is memory-mapped when the model is loaded, and models whose
+    synonyms are identical share the same mapping. Synonyms can be patched
+    or reloaded from the file in a running server with `update_synonyms`
+    and `reload_synonyms`."""
+
+    name = "components.botfront.entity_synonyms_endpoints.CompactEntitySynonymMapper"
+
+    # named after the component, so that the mappers of a pipeline do not overwrite each other
+    synonyms_file_name = "compact_entity_synonyms.bin"
+
+    def __init__(self, component_config=None, synonyms=None, synonyms_file=None):
+        # type: (Optional[Dict[Text, Any]], Optional[Dict[Text, Any]], Optional[Text]) -> None
+        super(CompactEntitySynonymMapper, self).__init__(component_config, synonyms)
+        # file of the model directory, as in the model metadata, the synonyms are updated in
+        self.synonyms_file = synonyms_file or self.synonyms_file_name
+        self._update_lock = Lock()
+
+    def persist(self, model_dir):
+        # type: (Text) -> Optional[Dict[Text, Any]]
+        self.synonyms_file = self.synonyms_file_name
+        write_synonyms(os.path.join(model_dir, self.synonyms_file), self.synonyms)
+        return {"synonyms_file": self.synonyms_file}
+
+    @classmethod
+    def load(cls,
+             model_dir=None,  # type: Optional[Text]
+             model_metadata=None,  # type: Optional[Metadata]
+             cached_component=None,  # type: Optional[CompactEntitySynonymMapper]
+             **kwargs  # type: **Any
+             ):
+        # type: (...) -> CompactEntitySynonymMapper
+
+        meta = model_metadata.for_component(cls.name)
+        file_name = meta.get("synonyms_file")
+        if not file_name:
+            return cls(meta)
+
+        synonyms_file = os.path.join(model_dir, file_name)
+        if not os.path.isfile(synonyms_file):
+            warnings.warn("Failed to load synonyms file from '{}'".format(synonyms_file))
+            return cls(meta, synonyms_file=file_name)
+        return cls(meta, cls._read_synonyms(synonyms_file), file_name)
+
+    @staticmethod
+    def _read_synonyms(synonyms_file):
+        # type: (Text) -> Any
+        if synonyms_file.endswith(".json"):
+            # models persisted before the binary store
+            return read_json_file(synonyms_file)
+        return load_synonyms(synonyms_file)
+
+    @staticmethod
+    def _write_synonyms(synonyms_file, synonyms):
+        # type: (Text, Dict[Text, Text]) -> None
+        if synonyms_file.endswith(".json"):
+            # the metadata of models persisted before the binary store references their JSON file
+            with atomic_path(synonyms_file) as tmp_path:
+                write_json_to_file(tmp_path, synonyms, separators=(',', ': '))
+        else:
+            write_synonyms(synonyms_file, synonyms)
+
+    def update_synonyms(self, model_dir, add=None, remove=None):
+        # type: (Text, Optional[Dict[Text, Text]], Optional[List[Text]]) -> int
+        """Adds synonyms (literal to value) and removes literals, then maps the
+        rewritten store in place of the current one. Returns the number of synonyms."""
+        with self._update_lock:
+            synonyms = dict(self.synonyms.items())
+            for literal in remove or []:
+                synonyms.pop(literal.lower(), None)
+            for literal, value in (add or {}).items():
+                synonyms[literal.lower()] = value
+            synonyms_file = os.path.join(model_dir, self.synonyms_file)
+            self._write_synonyms(synonyms_file, synonyms)
+            self.synonyms = self._read_synonyms(synonyms_file)
+            return len(self.synonyms)
+
+    def reload_synonyms(self, model_dir):
+        # type: (Text) -> int
+        """Maps the synonyms file of `model_dir` again, after it was rewritten by another process."""
+        with self._update_lock:
+            self.synonyms = self._read_synonyms(os.path.join(model_dir, self.synonyms_file))
+            return len(self.synonyms)
+
+
+class EntitySynonymBegin(CompactEntitySynonymMapper):
+    """Replaces the literals of the entities in the text by their synonym value.
+
+    The text is rebuilt in a single pass, and the replacements are kept in
+    the message for `EntitySynonymEnd` to restore the literals."""
 
-
-class EntitySynonymBegin(EntitySynonymMapper):
     name = "components.botfront.entity_synonyms_endpoints.EntitySynonymBegin"
 
     provides = ["entities"]
 
+    synonyms_file_name = "entity_synonym_begin.bin"
+
     def process(self, message, **kwargs):
         # type: (Message, **Any) -> None
         updated_entities = message.get("entities", [])[:]
         updated_entities.sort(key=lambda x: x["start"])
         self.replace_synonyms(updated_entities)
 
-        def shift_entities(entities, shift):
-            for e in entities:
-                e["start"] += shift
-                e["end"] += shift
-
-        if len(updated_entities):
-            for i, entity in enumerate(updated_entities):
-                literal = message.text[entity["start"]:entity["end"]]
-                value = entity["value"]
-                if value != literal and isinstance(value, str):
-                    entity["literal"] = literal
-                    message.text = message.text[0:entity["start"]] + value + message.text[entity["end"]:]
-                    shift = len(value) - (entity["end"] - entity["start"])
-                    entity["end"] = entity["start"] + len(value)
-                    if len(updated_entities) > i + 1: # more entities:
-                        shift_entities(updated_entities[i+1:], shift)
+        text = message.text
+        pieces = []
+        replacements = []
+        cursor = 0
+        shift = 0
+        for entity in updated_entities:
+            start, end = entity["start"], entity["end"]
+            literal = text[start:end]
+            value = entity["value"]
+            entity["start"] += shift
+            entity["end"] += shift
+            # entities overlapping a replaced one are only shifted
+            if value != literal and isinstance(value, str) and start >= cursor:
+                entity["literal"] = literal
+                entity["end"] = entity["start"] + len(value)
+                pieces.append(text[cursor:start])
+                pieces.append(value)
+                replacements.append((entity["start"], entity["end"], literal))
+                cursor = end
+                shift += len(value) - len(literal)
+
+        if replacements:
+            pieces.append(text[cursor:])
+            message.text = "".join(pieces)
+            message.set(REPLACEMENTS, replacements)
 
         message.set("entities", updated_entities, add_to_output=True)
 
 
 class EntitySynonymEnd(EntitySynonymMapper):
+    """Restores the literals replaced by `EntitySynonymBegin` in the text,
+    and the offsets of the entities, in a single pass."""
+
     name = "components.botfront.entity_synonyms_endpoints.EntitySynonymEnd"
 
     provides = ["entities"]
@@ -56,18 +172,33 @@ class EntitySynonymEnd(EntitySynonymMapper):
         updated_entities = message.get("entities", [])[:]
         updated_entities.sort(key=lambda x: x["start"])
 
-        def shift_entities(entities, shift):
-            for e in entities:
-                e["start"] += shift
-                e["end"] += shift
-
-        for i, entity in enumerate(updated_entities):
+        replacements = message.data.pop(REPLACEMENTS, None)
+        if replacements is None:
+            replacements = [(e["start"], e["end"], e["literal"]) for e in updated_entities if "literal" in e]
+
+        text = message.text
+        pieces = []
+        cursor = 0
+        for start, end, literal in replacements:
+            pieces.append(text[cursor:start])
+            pieces.append(literal)
+            cursor = end
+        pieces.append(text[cursor:])
+        message.text = "".join(pieces)
+
+        # entities are shifted back by the replacements before them
+        i = 0
+        shift = 0
+        for entity in updated_entities:
+            while i < len(replacements) and replacements[i][0] < entity["start"]:
+                start, end, literal = replacements[i]
+                shift += len(literal) - (end - start)
+                i += 1
+            entity["start"] += shift
             if "literal" in entity:
-                message.text = message.text[0:entity["start"]] + entity["literal"] + message.text[entity["end"]:]
-                shift = len(entity["literal"]) - (entity["end"] - entity["start"])
                 entity["end"] = entity["start"] + len(entity["literal"])
                 del entity["literal"]
-                if len(updated_entities) > i + 1: # more entities:
-                    shift_entities(updated_entities[i+1:], shift)
+            else:
+                entity["end"] += shift
 
         message.set("entities", updated_entities, add_to_output=True)
@@ -1,19 +1,25 @@
 import os
 import warnings
+from threading import Lock
 
 from typing import Any
 from typing import Text
 from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 
 from rasa_nlu.components import Component
 from rasa_nlu.config import RasaNLUModelConfig
 from rasa_nlu.training_data import Message, TrainingData
 from rasa_nlu.model import Metadata
 
-from fuzzy_matcher import process
+from .atomic_file import atomic_path
+from .fuzzy_matcher import process
+from .fuzzy_matcher.index import NGramIndex
+from .gazette_file import load_gazette, write_gazette
+from .lru_cache import LRUCache
 
-FUZZY_GAZETTE_FILE = "fuzzy_gazette.json"
 
 
 def _find_matches(query, gazette, mode="ratio", limit=5):
@@ -36,16 +42,31 @@ class FuzzyGazette(Component):
 
     provides = ["entities"]
 
+    # persisted as <file_prefix>.json (or .bin) and <file_prefix>_index.pkl
+    file_prefix = "fuzzy_gazette"
+
     defaults = {
         "max_num_suggestions": 5,
         "entities": [],
+        # "json", or "binary" to persist a gazette that is memory-mapped
+        # and read lazily when the model is loaded
+        "gazette_format": "json",
+        # number of (entity, value, mode, limit) lookups kept in memory, 0 to disable
+        "cache_size": 1000,
     }
 
-    def __init__(self, component_config=None, gazette=None):
-        # type: (RasaNLUModelConfig, Dict) -> None
+    def __init__(self, component_config=None, gazette=None, index=None):
+        # type: (RasaNLUModelConfig, Dict, Dict) -> None
 
         super(FuzzyGazette, self).__init__(component_config)
         self.gazette = gazette if gazette else {}
+        self.index = index if index is not None else self._build_index(self.gazette)
+        self.cache = LRUCache(self.component_config.get("cache_size"))
+        # `gazette` and `index` are replaced, never mutated, under `_lock`;
+        # `_generation` keeps lookups of a replaced gazette out of the cache
+        self._lock = Lock()
+        self._update_lock = Lock()
+        self._generation = 0
 
     def process(self, message, **kwargs):
         # type: (Message, **Any) -> None
@@ -54,39 +75,127 @@ class FuzzyGazette(Component):
         entities = message.get("entities", [])
         limit = self.component_config.get("max_num_suggestions")
 
+        configs = [_find_entity_config(entity, self.component_config) for entity in entities]
+        matches = self._match_entities([(entity, config) for entity, config in zip(entities, configs)
+                                        if config is not None and isinstance(entity["value"], str)], limit)
+
         new_entities = []
-        for entity in entities:
-            config = _find_entity_config(entity, self.component_config)
-            if config is None or not isinstance(entity["value"], str):
+        for entity, config in zip(entities, configs):
+            if id(entity) not in matches:
                 new_entities.append(entity)
                 continue
 
-            matches = process.extract(entity["value"], self.gazette.get(entity["entity"], []), limit=limit, scorer=config["mode"])
-            primary, score = matches[0] if len(matches) else (None, None)
+            entity_matches = matches[id(entity)]
+            primary, score = entity_matches[0] if len(entity_matches) else (None, None)
 
             if primary is not None and score > config["min_score"]:
                 entity["value"] = primary
-                entity["gazette_matches"] = [{"value": value, "score": num} for value, num in matches]
+                entity["gazette_matches"] = [{"value": value, "score": num} for value, num in entity_matches]
                 new_entities.append(entity)
 
         message.set("entities", new_entities)
 
+    def _match_entities(self, entities, limit):
+        # type: (List[Tuple[Dict, Dict]], int) -> Dict[int, List]
+        """Gazette matches of each entity, keyed by id.
+
+        Cached lookups are reused; the other entities checked against the same
+        gazette with the same options are scored in a single batch."""
+
+        with self._lock:
+            gazette, index, generation = self.gazette, self.index, self._generation
+
+        matches = {}
+        batches = {}
+        for entity, config in entities:
+            min_score = config["min_score"] if config["bounded"] else None
+            key = (generation, entity["entity"], entity["value"], config["mode"], limit, min_score)
+            cached = self.cache.get(key)
+            if cached is not None:
+                matches[id(entity)] = cached
+            else:
+                batches.setdefault((entity["entity"], config["mode"], min_score), []).append(entity)
+
+        for (name, mode, min_score), batch in batches.items():
+            results = process.extract_batch([entity["value"] for entity in batch], gazette.get(name, []),
+                                            scorer=mode, limit=limit, index=index.get(name),
+                                            min_score=min_score)
+            for entity, result in zip(batch, results):
+                matches[id(entity)] = result
+                self.cache.set((generation, name, entity["value"], mode, limit, min_score), result)
+        return matches
+
     def train(self, training_data, config, **kwargs):
         # type: (TrainingData, RasaNLUModelConfig, **Any) -> None
 
         self._load_gazette_list(training_data.fuzzy_gazette)
+        self._replace_gazette(self.gazette, self._build_index(self.gazette))
+
+    def update_gazette(self, name, add=None, remove=None):
+        # type: (Text, Optional[List[Text]], Optional[List[Text]]) -> int
+        """Adds and removes values of an entity without retraining.
+
+        Only the n-grams of the changed values are indexed or unindexed, and
+        lookups running meanwhile keep using the previous gazette. Returns the
+        new number of values of the entity."""
+
+        with self._update_lock:
+            values = list(self.gazette.get(name, []))
+            removed = set(remove or [])
+            positions = [i for i, value in enumerate(values) if value in removed]
+
+            kept = set(values) - removed
+            added = []
+            for value in add or []:
+                if value not in kept:
+                    added.append(value)
+                    kept.add(value)
+
+            values = [value for value in values if value not in removed] + added
+            index = self.index.get(name)
+            index = index.updated(positions, added) if index is not None else NGramIndex(values)
+
+            gazette = dict(self.gazette)
+            gazette[name] = values
+            indices = dict(self.index)
+            indices[name] = index
+            self._replace_gazette(gazette, indices)
+
+        return len(values)
+
+    def _replace_gazette(self, gazette, index):
+        with self._lock:
+            self.gazette, self.index = gazette, index
+            self._generation += 1
+        self.cache.clear()
 
     def persist(self, model_dir):
         # type: (Text) -> Optional[Dict[Text, Any]]
+        """Writes the gazette and its index, each file replaced atomically.
+
+        Updates wait for the files to be written, so that both are of the
+        same version of the gazette."""
 
-        gazette = self.gazette if self.gazette else {}
+        from rasa_nlu.utils import pycloud_pickle, write_json_to_file
 
-        from rasa_nlu.utils import write_json_to_file
-        file_name = os.path.join(model_dir, FUZZY_GAZETTE_FILE)
-        write_json_to_file(file_name, gazette,
-                               separators=(',', ': '))
+        with self._update_lock:
+            with self._lock:
+                gazette, index = self.gazette or {}, self.index
 
-        return {"gazette_file": FUZZY_GAZETTE_FILE}
+            if self.component_config.get("gazette_format") == "binary":
+                gazette_file = self.file_prefix + ".bin"
+                write_gazette(os.path.join(model_dir, gazette_file), gazette)
+            else:
+                gazette_file = self.file_prefix + ".json"
+                with atomic_path(os.path.join(model_dir, gazette_file)) as tmp_path:
+                    write_json_to_file(tmp_path, {name: list(values) for name, values in gazette.items()},
+                                       separators=(',', ': '))
+
+            index_file = self.file_prefix + "_index.pkl"
+            with atomic_path(os.path.join(model_dir, index_file)) as tmp_path:
+                pycloud_pickle(tmp_path, index)
+
+        return {"gazette_file": gazette_file, "index_file": index_file}
 
     @classmethod
     def load(cls,
@@ -98,17 +207,31 @@ class FuzzyGazette(Component):
         from rasa_nlu.utils import read_json_file
 
         meta = model_metadata.for_component(cls.name)
-        file_name = meta.get("gazette_file", FUZZY_GAZETTE_FILE)
+        file_name = meta.get("gazette_file", cls.file_prefix + ".json")
         path = os.path.join(model_dir, file_name)
 
-        if os.path.isfile(path):
+        if os.path.isfile(path) and meta.get("gazette_format") == "binary":
+            gazette = load_gazette(path)
+        elif os.path.isfile(path):
             gazette = read_json_file(path)
         else:
             gazette = None
             warnings.warn("Failed to load gazette file from '{}'"
                           "".format(path))
 
-        return FuzzyGazette(meta, gazette)
+        # models persisted before the index was introduced rebuild it on load
+        index = None
+        index_path = os.path.join(model_dir, meta.get("index_file", cls.file_prefix + "_index.pkl"))
+        if gazette is not None and os.path.isfile(index_path):
+            from rasa_nlu.utils import pycloud_unpickle
+            index = pycloud_unpickle(index_path)
+
+        return cls(meta, gazette, index)
+
+    @staticmethod
+    def _build_index(gazette):
+        # type: (Dict) -> Dict
+        return {name: NGramIndex(values) for name, values in gazette.items()}
 
     def _load_gazette_list(self, gazette):
         # type: (Dict) -> None
@@ -124,9 +247,10 @@ class FuzzyGazette(Component):
             assert "name" in rep, "Must provide the entity name for the gazette entity configuration: {}".format(rep)
             assert rep["name"] in self.gazette, "Could not find entity name {0} in gazette {1}".format(rep["name"], self.gazette)
 
-            supported_properties = ["mode", "min_score"]
-            defaults = ["ratio", 80]
-            types = [str, int]
+            # with `bounded`, suggestions scoring below `min_score` are not computed
+            supported_properties = ["mode", "min_score", "bounded"]
+            defaults = ["ratio", 80, False]
+            types = [str, int, bool]
 
             new_element = {"name": rep["name"]}
             for prop, default, t in zip(supported_properties, defaults, types):
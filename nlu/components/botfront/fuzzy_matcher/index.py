@@ -0,0 +1,163 @@
+from collections import Counter, defaultdict
+
+from typing import List
+from typing import Text
+
+import numpy as np
+
+from . import process
+
+PAD = '\x00'
+
+
+def ngrams(value, n=3, padded=True):
+    if padded:
+        value = PAD * (n - 1) + value + PAD * (n - 1)
+    return Counter(value[i:i + n] for i in range(len(value) - n + 1))
+
+
+class NGramIndex(object):
+    """Character n-gram inverted index over a list of choices.
+
+    Each gram maps to the indices of the choices containing it. At query time
+    the number of grams shared with each choice gives a lower bound on the edit
+    distance (every edit destroys at most `n` grams), hence an upper bound on
+    the score. Choices are scored in decreasing bound order, and the search
+    stops as soon as the remaining bounds cannot enter the top `limit`, so
+    results are identical to `process.extract`. The number of choices scored
+    depends on how low the `limit`-th best score is, or on `min_score` when
+    given. A high enough `min_score` also restricts the search to the choices
+    sharing a gram with the query, making it sublinear in the number of
+    choices.
+
+    The index only stores positions: the choices themselves are passed at
+    query time so that they are not persisted twice."""
+
+    def __init__(self, choices, n=3):
+        self.n = n
+        self.lengths = np.array([len(c) for c in choices], dtype=np.int32)
+        self.distinct_lengths = np.unique(self.lengths)
+        self.postings = {}
+        # choices containing a gram more than once (rare), gram -> {idx: count}
+        self.multi = {}
+
+        for gram, indices in self._index_choices(choices).items():
+            self.postings[gram] = np.array(indices, dtype=np.uint32)
+
+    def _index_choices(self, choices, start=0):
+        postings = defaultdict(list)
+        for idx, choice in enumerate(choices, start):
+            for gram, count in ngrams(choice, self.n).items():
+                postings[gram].append(idx)
+                if count > 1:
+                    self.multi.setdefault(gram, {})[idx] = count
+        return postings
+
+    def updated(self, removed, added):
+        # type: (List[int], List[Text]) -> NGramIndex
+        """New index for the choices without the `removed` positions, followed by `added`.
+
+        The postings of untouched grams are only renumbered, and this index is
+        left unchanged for the lookups still using it."""
+
+        removed = np.unique(np.asarray(removed, dtype=np.int64))
+        index = NGramIndex.__new__(NGramIndex)
+        index.n = self.n
+        index.postings = {}
+        index.multi = {}
+
+        if len(removed):
+            keep = np.ones(len(self.lengths), dtype=bool)
+            keep[removed] = False
+            lengths = self.lengths[keep]
+            for gram, indices in self.postings.items():
+                indices = indices[keep[indices]]
+                if len(indices):
+                    index.postings[gram] = (indices - np.searchsorted(removed, indices)).astype(np.uint32)
+            for gram, counts in self.multi.items():
+                counts = {idx - int(np.searchsorted(removed, idx)): count
+                          for idx, count in counts.items() if keep[idx]}
+                if counts:
+                    index.multi[gram] = counts
+        else:
+            lengths = self.lengths
+            index.postings = dict(self.postings)
+            index.multi = {gram: dict(counts) for gram, counts in self.multi.items()}
+
+        for gram, indices in index._index_choices(added, start=len(lengths)).items():
+            new = np.array(indices, dtype=np.uint32)
+            index.postings[gram] = np.concatenate([index.postings[gram], new]) if gram in index.postings else new
+
+        index.lengths = np.concatenate([lengths, np.array([len(c) for c in added], dtype=np.int32)])
+        index.distinct_lengths = np.unique(index.lengths)
+        return index
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def _grams(self, value, scorer):
+        return ngrams(value, self.n, padded=scorer == 'ratio')
+
+    def _shared_grams(self, grams):
+        shared = np.zeros(len(self.lengths), dtype=np.int32)
+        for gram, count in grams.items():
+            indices = self.postings.get(gram)
+            if indices is None:
+                continue
+            shared[indices] += 1
+            if count > 1:
+                for idx, choice_count in self.multi.get(gram, {}).items():
+                    shared[idx] += min(count, choice_count) - 1
+        return shared
+
+    def _sparse_shared_grams(self, grams):
+        """Choices sharing at least one gram, and the number of grams they share."""
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+        indices, shared = np.unique(np.concatenate(lists), return_counts=True)
+        shared = shared.astype(np.int32)
+        for gram, count in grams.items():
+            if count > 1 and gram in self.multi:
+                for idx, choice_count in self.multi[gram].items():
+                    shared[np.searchsorted(indices, idx)] += min(count, choice_count) - 1
+        return indices.astype(np.int64), shared
+
+    def _bounds(self, query_length, lengths, shared, scorer):
+        n = self.n
+        if scorer == 'ratio':
+            longest = np.maximum(lengths, query_length)
+            min_distance = np.maximum(np.abs(lengths - query_length),
+                                      -((shared - longest - n + 1) // n))
+            bounds = 100 * (1 - min_distance / np.maximum(longest, 1))
+        else:
+            shortest = np.minimum(lengths, query_length)
+            min_distance = np.maximum(0, -((shared - shortest + n - 1) // n))
+            bounds = 100 * (1 - min_distance / max(query_length, 1))
+
+        return bounds.astype(np.int16)
+
+    def _upper_bounds(self, value, scorer):
+        shared = self._shared_grams(self._grams(value, scorer))
+        return self._bounds(len(value), self.lengths, shared, scorer)
+
+    def extract(self, value, choices, scorer='ratio', limit=5, min_score=None):
+        if limit is None:
+            return process.extract(value, choices, scorer=scorer, limit=limit, min_score=min_score)
+        if limit <= 0 or not len(choices):
+            return []
+        assert len(choices) == len(self), \
+            "The index was built for {} choices, got {}".format(len(self), len(choices))
+
+        if min_score is not None:
+            # when no choice sharing zero grams can reach `min_score`, only
+            # the postings of the query grams are looked at
+            no_shared = np.zeros(len(self.distinct_lengths), dtype=np.int32)
+            if self._bounds(len(value), self.distinct_lengths, no_shared, scorer).max() < min_score:
+                indices, shared = self._sparse_shared_grams(self._grams(value, scorer))
+                bounds = self._bounds(len(value), self.lengths[indices], shared, scorer)
+                return process.top_k(value, choices, bounds, scorer=scorer, limit=limit,
+                                     min_score=min_score, indices=indices)
+
+        bounds = self._upper_bounds(value, scorer)
+        return process.top_k(value, choices, bounds, scorer=scorer, limit=limit, min_score=min_score)
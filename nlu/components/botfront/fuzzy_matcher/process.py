@@ -1,16 +1,54 @@
 import editdistance
+import heapq
 import operator
 
+import numpy as np
+
 
 def distance(val1, val2):
     return editdistance.eval(val1, val2)
 
 
+def bounded_distance(val1, val2, max_distance):
+    """Edit distance if it is at most `max_distance`, `max_distance + 1` otherwise."""
+
+    if abs(len(val1) - len(val2)) > max_distance:
+        return max_distance + 1
+    if max_distance == 0:
+        return 0 if val1 == val2 else 1
+    # banded DP that gives up as soon as the bound is passed
+    if not editdistance.eval_criterion(val1, val2, max_distance):
+        return max_distance + 1
+    return editdistance.eval(val1, val2)
+
+
+def _max_distance(min_score, length):
+    # largest distance d such that int(100 * (1 - d / length)) >= min_score
+    d = int(length * (100 - min_score) / 100)
+    while d >= 0 and int(100*(1 - d / length)) < min_score:
+        d -= 1
+    while d < length and int(100*(1 - (d + 1) / length)) >= min_score:
+        d += 1
+    return d
+
+
 def ratio(val1, val2):
     max_distance = max(len(val1), len(val2))
     return int(100*(1 - distance(val1, val2) / max_distance))
 
 
+def bounded_ratio(val1, val2, min_score):
+    """`ratio` if it is at least `min_score`, None otherwise."""
+    max_distance = max(len(val1), len(val2))
+    bound = _max_distance(min_score, max_distance)
+    if bound < 0:
+        return None
+    d = bounded_distance(val1, val2, bound)
+    if d > bound:
+        return None
+    return int(100*(1 - d / max_distance))
+
+
 def partial_distance(val1, val2):
     values = sorted([val1, val2], key=len, reverse=True)
     distances = []
@@ -19,23 +57,193 @@ def partial_distance(val1, val2):
     return min(distances)
 
 
+def substring_distance(val1, val2):
+    """Smallest edit distance between the shorter value and any substring of the longer one.
+
+    Myers' bit-vector algorithm: one pass over the longer value, with the DP
+    column for the shorter one packed in the bits of an integer. It is a lower
+    bound of `partial_distance`, whose substrings all have the shorter length."""
+
+    text, pattern = sorted([val1, val2], key=len, reverse=True)
+    m = len(pattern)
+    if m == 0:
+        return 0
+
+    peq = {}
+    for i, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+
+    pv, mv = mask, 0
+    score = best = m
+    for char in text:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        # no carry into the first row: a match can start anywhere in the text
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+        if score < best:
+            best = score
+    return best
+
+
+def bounded_partial_distance(val1, val2, max_distance):
+    longer, shorter = sorted([val1, val2], key=len, reverse=True)
+    if substring_distance(shorter, longer) > max_distance:
+        return max_distance + 1
+    best = max_distance + 1
+    for i in range(0, len(longer) - len(shorter) + 1):
+        # every window after a match only has to beat it
+        best = min(best, bounded_distance(shorter, longer[i:i + len(shorter)], best - 1))
+        if best == 0:
+            break
+    return best
+
+
 def partial_ratio(val1, val2):
     max_distance = len(val1)
     return int(100*(1 - partial_distance(val1, val2) / max_distance))
 
 
+def bounded_partial_ratio(val1, val2, min_score):
+    """`partial_ratio` if it is at least `min_score`, None otherwise."""
+    max_distance = len(val1)
+    bound = _max_distance(min_score, max_distance)
+    if bound < 0:
+        return None
+    d = bounded_partial_distance(val1, val2, bound)
+    if d > bound:
+        return None
+    return int(100*(1 - d / max_distance))
+
+
+def substring_ratio(val1, val2):
+    max_distance = len(val1)
+    return int(100*(1 - substring_distance(val1, val2) / max_distance))
+
+
+def bounded_substring_ratio(val1, val2, min_score):
+    """`substring_ratio` if it is at least `min_score`, None otherwise."""
+    score = substring_ratio(val1, val2)
+    return score if score >= min_score else None
+
+
 def _get_scorer(scorer_name):
     if scorer_name == 'ratio':
         return ratio
     elif scorer_name == 'partial_ratio':
         return partial_ratio
+    elif scorer_name == 'substring_ratio':
+        return substring_ratio
 
 
-def extract(value, choices=[], scorer='ratio', limit=5):
-    scorerfn = _get_scorer(scorer)
-    distances = [(choice, scorerfn(value, choice)) for choice in choices]
+def _get_bounded_scorer(scorer_name):
+    if scorer_name == 'ratio':
+        return bounded_ratio
+    elif scorer_name == 'partial_ratio':
+        return bounded_partial_ratio
+    elif scorer_name == 'substring_ratio':
+        return bounded_substring_ratio
+
+
+def extract(value, choices=[], scorer='ratio', limit=5, index=None, min_score=None):
+    """Best `limit` choices for `value`.
+
+    With `min_score`, choices scoring below it are skipped (and left out of the
+    result) without computing their full distance."""
+
+    if index is not None:
+        return index.extract(value, choices, scorer=scorer, limit=limit, min_score=min_score)
+
+    if min_score is not None:
+        scorerfn = _get_bounded_scorer(scorer)
+        distances = [(choice, scorerfn(value, choice, min_score)) for choice in choices]
+        distances = [d for d in distances if d[1] is not None]
+    else:
+        scorerfn = _get_scorer(scorer)
+        distances = [(choice, scorerfn(value, choice)) for choice in choices]
     distances.sort(key=operator.itemgetter(1), reverse=True)
     return distances[0:limit]
 
 
+def length_bounds(value, lengths, scorer='ratio'):
+    """Upper bound of the score of each choice given only its length."""
+    if scorer != 'ratio':
+        return np.full(len(lengths), 100, dtype=np.int16)
+    longest = np.maximum(np.maximum(lengths, len(value)), 1)
+    return (100 * (1 - np.abs(lengths - len(value)) / longest)).astype(np.int16)
+
+
+def top_k(value, choices, bounds, scorer='ratio', limit=5, min_score=None, indices=None):
+    """Best `limit` choices, scoring them in decreasing order of their score upper `bounds`.
+
+    Stops as soon as no remaining choice can enter the top `limit`; results are
+    identical to `extract`. If given, `indices` (sorted) are the positions in
+    `choices` of the bounds, and other choices are ignored."""
+
+    if min_score is not None:
+        scorerfn = _get_bounded_scorer(scorer)
+        candidates = np.flatnonzero(bounds >= min_score)
+        order = candidates[np.argsort(-bounds[candidates], kind='mergesort')]
+    else:
+        scorerfn = _get_scorer(scorer)
+        order = np.argsort(-bounds, kind='mergesort')
+    positions = order if indices is None else indices[order]
+
+    # min-heap of (score, -idx): the root is the current worst match
+    best = []
+    for idx, bound in zip(positions.tolist(), bounds[order].tolist()):
+        if len(best) == limit and best[0][0] > bound:
+            break
+        if min_score is None:
+            score = scorerfn(value, choices[idx])
+        else:
+            score = scorerfn(value, choices[idx], min_score)
+            if score is None:
+                continue
+        entry = (score, -idx)
+        if len(best) < limit:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+
+    best.sort(key=lambda e: (-e[0], -e[1]))
+    return [(choices[-idx], score) for score, idx in best]
+
+
+def extract_batch(values, choices=[], scorer='ratio', limit=5, index=None, min_score=None):
+    """`extract` for several values against the same choices.
+
+    Choice lengths are encoded once in a NumPy array (or taken from the index)
+    to bound scores, each distinct value is scored once, and the top `limit`
+    are kept in a heap instead of sorting all choices."""
+
+    if limit is None:
+        return [extract(value, choices, scorer=scorer, limit=limit, min_score=min_score) for value in values]
+    if limit <= 0 or not len(choices):
+        return [[] for _ in values]
+
+    if index is None:
+        lengths = np.fromiter((len(c) for c in choices), dtype=np.int32, count=len(choices))
+
+    results = {}
+    for value in values:
+        if value in results:
+            continue
+        if index is not None:
+            results[value] = index.extract(value, choices, scorer=scorer, limit=limit, min_score=min_score)
+        else:
+            bounds = length_bounds(value, lengths, scorer)
+            results[value] = top_k(value, choices, bounds, scorer=scorer, limit=limit, min_score=min_score)
 
+    return [results[value] for value in values]
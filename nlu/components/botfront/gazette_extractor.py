@@ -0,0 +1,106 @@
+import re
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Text
+from typing import Tuple
+
+from rasa_nlu.extractors import EntityExtractor
+from rasa_nlu.training_data import Message
+
+from .fuzzy_gazette import FuzzyGazette
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _token_spans(message):
+    # type: (Message) -> List[Tuple[int, int]]
+    tokens = message.get("tokens")
+    if tokens:
+        return [(token.offset, token.end) for token in tokens]
+    return [match.span() for match in TOKEN_PATTERN.finditer(message.text)]
+
+
+def _resolve_overlaps(candidates):
+    # type: (List[Dict]) -> List[Dict]
+    """Keeps the best scoring, then longest, of overlapping mentions."""
+
+    candidates = sorted(candidates, key=lambda c: (-c["gazette_matches"][0]["score"],
+                                                   c["start"] - c["end"], c["start"]))
+    kept = []
+    for candidate in candidates:
+        if all(candidate["end"] <= e["start"] or candidate["start"] >= e["end"] for e in kept):
+            kept.append(candidate)
+    return sorted(kept, key=lambda e: e["start"])
+
+
+class GazetteExtractor(FuzzyGazette, EntityExtractor):
+    """Finds gazette values mentioned in the message text.
+
+    Every span of up to `max_ngram_size` consecutive tokens (by default, as
+    many tokens as the longest value of the entity) is looked up in the gazette
+    index, exactly or fuzzily within `min_score`. Only the choices sharing
+    n-grams with a span are scored, so the cost grows with the message rather
+    than with the gazette. Entities have the same shape as the ones corrected
+    by `FuzzyGazette`."""
+
+    name = "components.botfront.gazette_extractor.GazetteExtractor"
+
+    provides = ["entities"]
+
+    file_prefix = "gazette_extractor"
+
+    defaults = dict(FuzzyGazette.defaults, max_ngram_size=None)
+
+    def __init__(self, component_config=None, gazette=None, index=None):
+        # type: (Dict, Dict, Dict) -> None
+
+        super(GazetteExtractor, self).__init__(component_config, gazette, index)
+        self._max_tokens = {}
+
+    def _max_ngram_size(self, name):
+        # type: (Text) -> int
+        if self.component_config.get("max_ngram_size"):
+            return self.component_config["max_ngram_size"]
+        if name not in self._max_tokens:
+            self._max_tokens[name] = max([len(TOKEN_PATTERN.findall(value)) for value in self.gazette[name]] + [1])
+        return self._max_tokens[name]
+
+    def process(self, message, **kwargs):
+        # type: (Message, **Any) -> None
+
+        self._load_config()
+        limit = self.component_config.get("max_num_suggestions")
+        spans = _token_spans(message)
+
+        mentions = []
+        for config in self.component_config["entities"]:
+            # mentions are always looked up with `min_score` as a bound
+            config = dict(config, bounded=True)
+            size = self._max_ngram_size(config["name"])
+            for i, (start, _) in enumerate(spans):
+                for _, end in spans[i:i + size]:
+                    mentions.append(({"entity": config["name"],
+                                      "value": message.text[start:end],
+                                      "start": start,
+                                      "end": end}, config))
+
+        matches = self._match_entities(mentions, limit)
+
+        candidates = []
+        for mention, config in mentions:
+            mention_matches = matches[id(mention)]
+            if len(mention_matches) and mention_matches[0][1] > config["min_score"]:
+                mention["value"] = mention_matches[0][0]
+                mention["gazette_matches"] = [{"value": value, "score": num} for value, num in mention_matches]
+                candidates.append(mention)
+
+        extracted = self.add_extractor_name(_resolve_overlaps(candidates))
+        message.set("entities",
+                    message.get("entities", []) + extracted,
+                    add_to_output=True)
+
+    def _replace_gazette(self, gazette, index):
+        super(GazetteExtractor, self)._replace_gazette(gazette, index)
+        self._max_tokens = {}
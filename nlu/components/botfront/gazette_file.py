@@ -0,0 +1,112 @@
+import json
+import mmap
+import os
+import struct
+import weakref
+from collections.abc import Sequence
+
+import numpy as np
+from typing import Dict
+from typing import Text
+
+from .atomic_file import atomic_path
+
+MAGIC = b"BFGZ"
+VERSION = 1
+
+# magic, version, offset of the JSON header describing the entities
+_PREFIX = struct.Struct("<4sIQ")
+_LENGTH = struct.Struct("<I")
+
+_open_files = weakref.WeakValueDictionary()
+
+
+def write_gazette(path, gazette):
+    # type: (Text, Dict[Text, Sequence[Text]]) -> None
+    """Writes a gazette in the binary format read by `GazetteFile`.
+
+    For each entity: an array of little-endian uint64 offsets, one per value,
+    followed by the values as length-prefixed UTF-8 strings. The file is
+    replaced atomically, so processes still mapping a previous version of it
+    keep reading consistent data."""
+
+    sections = {}
+    with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, 0))
+        for name, values in gazette.items():
+            encoded = [value.encode("utf-8") for value in values]
+            f.write(b"\0" * (-f.tell() % 8))
+
+            offsets_start = f.tell()
+            offsets = np.empty(len(encoded), dtype="<u8")
+            position = offsets_start + offsets.nbytes
+            for i, value in enumerate(encoded):
+                offsets[i] = position
+                position += _LENGTH.size + len(value)
+
+            f.write(offsets.tobytes())
+            for value in encoded:
+                f.write(_LENGTH.pack(len(value)))
+                f.write(value)
+            sections[name] = {"offsets": offsets_start, "count": len(encoded)}
+
+        header_offset = f.tell()
+        f.write(json.dumps(sections).encode("utf-8"))
+        f.seek(0)
+        f.write(_PREFIX.pack(MAGIC, VERSION, header_offset))
+
+
+class MappedValues(Sequence):
+    """Read-only sequence of the values of one entity, decoded on access."""
+
+    def __init__(self, gazette_file, offsets_start, count):
+        # keeps the file mapped (and cached by `load_gazette`) while in use
+        self._file = gazette_file
+        self._buffer = gazette_file.buffer
+        self._offsets = np.frombuffer(self._buffer, dtype="<u8", count=count, offset=offsets_start)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        position = int(self._offsets[idx])
+        length, = _LENGTH.unpack_from(self._buffer, position)
+        start = position + _LENGTH.size
+        return self._buffer[start:start + length].decode("utf-8")
+
+    def __repr__(self):
+        return "<MappedValues of {} values>".format(len(self))
+
+
+class GazetteFile(object):
+    """Memory-mapped binary gazette.
+
+    Pages are only read when values are accessed, and being mapped read-only
+    from the same file they are shared by every process serving the model."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_offset = _PREFIX.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("'{}' is not a version {} gazette file".format(path, VERSION))
+
+        sections = json.loads(self.buffer[header_offset:].decode("utf-8"))
+        self.entities = {name: MappedValues(self, section["offsets"], section["count"])
+                         for name, section in sections.items()}
+
+
+def load_gazette(path):
+    # type: (Text) -> Dict[Text, MappedValues]
+    """Maps a binary gazette, reusing the mapping if the file is already open."""
+
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_mtime, stat.st_size)
+    gazette_file = _open_files.get(key)
+    if gazette_file is None:
+        gazette_file = GazetteFile(path)
+        _open_files[key] = gazette_file
+    return gazette_file.entities
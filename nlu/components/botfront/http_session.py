@@ -0,0 +1,42 @@
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from typing import Dict
+from typing import Text
+
+
+def pooled_session(pool_size=10):
+    # type: (int) -> requests.Session
+    """Session keeping up to `pool_size` connections per host alive between messages."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class LatencyStats(object):
+    """Count, mean and maximum of the durations of requests, in milliseconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = Lock()
+
+    def record(self, seconds):
+        # type: (float) -> None
+        with self._lock:
+            self.count += 1
+            self.total += seconds * 1000
+            self.max = max(self.max, seconds * 1000)
+
+    def stats(self):
+        # type: () -> Dict[Text, float]
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "max_ms": self.max,
+        }
@@ -0,0 +1,220 @@
+import atexit
+import glob
+import io
+import json
+import logging
+import os
+import time
+from threading import Event, Lock, Thread
+
+from six.moves import queue
+
+import requests
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Text
+
+from .circuit_breaker import CircuitBreaker
+from .http_session import pooled_session
+
+logger = logging.getLogger(__name__)
+
+
+class LogShipper(object):
+    """Posts log records to a url from a single background thread.
+
+    Records are queued (up to `max_queue`, further ones are dropped) and
+    posted one by one as JSON objects to `url`. Batching is opt-in: with a
+    `batch_size` larger than 1, records are posted as JSON lists of up to
+    `batch_size` records (whatever is queued after `flush_interval` seconds)
+    to `batch_url`, or to `url` if not given. Failed posts are retried `max_retries` times with
+    exponential backoff, then the batch is written to `spool_dir` (if given,
+    dropped otherwise). The url is then considered down: the next batches
+    are spooled without being posted, and every `retry_interval` seconds a
+    single attempt is made to post the spooled records, oldest first."""
+
+    _shippers = {}
+    _shippers_lock = Lock()
+
+    def __init__(self,
+                 url,  # type: Text
+                 batch_size=1,  # type: int
+                 flush_interval=1.0,  # type: float
+                 max_queue=10000,  # type: int
+                 max_retries=3,  # type: int
+                 backoff=0.5,  # type: float
+                 timeout=5.0,  # type: float
+                 spool_dir=None,  # type: Optional[Text]
+                 retry_interval=30.0,  # type: float
+                 batch_url=None,  # type: Optional[Text]
+                 ):
+        self.url = url
+        self.batch_url = batch_url or url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.spool_dir = spool_dir
+        if spool_dir and not os.path.isdir(spool_dir):
+            os.makedirs(spool_dir)
+
+        self.sent = 0
+        self.dropped = 0
+        self.failures = 0
+        # including the records spooled by a previous process
+        self.spooled = sum(len(self._read_spool_file(path)) for path in self._spool_files()) if spool_dir else 0
+
+        self._breaker = CircuitBreaker(failure_threshold=1, reset_timeout=retry_interval)
+        self._queue = queue.Queue(max_queue)
+        self._session = pooled_session(1)
+        self._stopped = Event()
+        self._spool_count = 0
+        self._thread = Thread(target=self._run, name="LogShipper", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_url(cls, url, **kwargs):
+        # type: (Text, **Any) -> LogShipper
+        """The shipper of `url`, created with `kwargs` by the first caller."""
+        with cls._shippers_lock:
+            if url not in cls._shippers:
+                cls._shippers[url] = cls(url, **kwargs)
+            return cls._shippers[url]
+
+    def submit(self, record):
+        # type: (Dict[Text, Any]) -> bool
+        """Queues a record, returns False if it was dropped because the queue is full."""
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=None):
+        # type: (Optional[float]) -> bool
+        """Waits until the queued records are posted or spooled."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        # type: () -> Dict[Text, int]
+        return {
+            "queued": self._queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "spooled": self.spooled,
+            "failures": self.failures,
+            "state": self._breaker.state,
+        }
+
+    def _run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if self.spooled and self._breaker.allow():
+                # the spooled records are posted before the new ones
+                self._record(self._send_spooled())
+            if batch:
+                # only the first failing batch is retried, then the url is down until the spool is posted
+                retries = self.max_retries if self._breaker.state == CircuitBreaker.CLOSED else 0
+                if not (self._breaker.allow() and self._record(self._send(batch, retries))):
+                    self._spool(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _record(self, sent):
+        # type: (bool) -> bool
+        if sent:
+            self._breaker.success()
+        else:
+            self._breaker.failure()
+        return sent
+
+    def _next_batch(self):
+        # type: () -> List[Dict[Text, Any]]
+        batch = []
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.time())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, batch, retries):
+        # type: (List[Dict[Text, Any]], int) -> bool
+        # the shape of the payload only depends on the configuration, not on the traffic
+        url, payload = (self.batch_url, batch) if self.batch_size > 1 else (self.url, batch[0])
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                response = self._session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code < 500:
+                    if response.status_code >= 400:
+                        logger.error("Activity log rejected by {}. Status Code: {}. Response: {}"
+                                     "".format(url, response.status_code, response.text))
+                    self.sent += len(batch)
+                    return True
+            except requests.exceptions.RequestException as e:
+                logger.debug("Failed to post activity log to {}: {}".format(url, e))
+            self.failures += 1
+        return False
+
+    def _spool(self, batch):
+        # type: (List[Dict[Text, Any]]) -> None
+        if not self.spool_dir:
+            self.dropped += len(batch)
+            logger.error("Could not post {} activity log records to {}, they are dropped."
+                         "".format(len(batch), self.url))
+            return
+
+        self._spool_count += 1
+        path = os.path.join(self.spool_dir, "activity-{:.6f}-{}.jsonl".format(time.time(), self._spool_count))
+        with io.open(path, "w", encoding="utf-8") as f:
+            for record in batch:
+                f.write(json.dumps(record) + "\n")
+        self.spooled += len(batch)
+        logger.warning("Could not post {} activity log records to {}, they are spooled to {}."
+                       "".format(len(batch), self.url, path))
+
+    def _spool_files(self):
+        # type: () -> List[Text]
+        return sorted(glob.glob(os.path.join(self.spool_dir, "activity-*.jsonl")))
+
+    @staticmethod
+    def _read_spool_file(path):
+        # type: (Text) -> List[Dict[Text, Any]]
+        with io.open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _send_spooled(self):
+        # type: () -> bool
+        """Posts the spooled records, returns False if the url is still down."""
+        for path in self._spool_files():
+            records = self._read_spool_file(path)
+            for i in range(0, len(records), self.batch_size):
+                if not self._send(records[i:i + self.batch_size], 0):
+                    # only the records posted are removed
+                    with io.open(path, "w", encoding="utf-8") as f:
+                        for record in records[i:]:
+                            f.write(json.dumps(record) + "\n")
+                    self.spooled -= i
+                    return False
+            os.remove(path)
+            self.spooled -= len(records)
+        return True
+
+
+@atexit.register
+def _flush_shippers():
+    for shipper in list(LogShipper._shippers.values()):
+        shipper.flush(timeout=5)
@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+from typing import Text
+
+
+class LRUCache(object):
+    """Thread-safe bounded mapping evicting the least recently used entries.
+
+    A `maxsize` of 0 disables the cache. With a `ttl`, entries are also
+    dropped that many seconds after they were set."""
+
+    def __init__(self, maxsize=1000, ttl=None, clock=time.monotonic):
+        # type: (int, Optional[float], Callable[[], float]) -> None
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._clock = clock
+        self._data = OrderedDict()
+        self._expires = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        # type: (Hashable, Any) -> Any
+        with self._lock:
+            if key in self._data:
+                if self.ttl is not None and self._expires[key] <= self._clock():
+                    del self._data[key]
+                    del self._expires[key]
+                    self.expired += 1
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        # type: (Hashable, Any) -> None
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.ttl is not None:
+                self._expires[key] = self._clock() + self.ttl
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._expires.pop(evicted, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+    def stats(self):
+        # type: () -> Dict[Text, int]
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+        }
@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from typing import Any
+from typing import Hashable
+from typing import Optional
+
+from rasa_nlu.training_data import Message
+
+
+class Prefetch(object):
+    """Result of a request started before the component runs."""
+
+    def __init__(self, key, future):
+        self.key = key
+        self.future = future
+
+
+class Prefetcher(object):
+    """Mixin for components waiting on a network service.
+
+    With `prefetch` enabled in the component configuration, `Interpreter.parse`
+    calls `prefetch` when the message enters the pipeline, so the request
+    runs in a background thread while the previous components process the
+    message. `process` then calls `fetched`, which joins the request, or runs
+    it again if the inputs it depends on were changed by a previous
+    component, e.g. a spell checker replacing the text.
+
+    Components implement `fetch_key`, returning these inputs, and `fetch`,
+    requesting the service from them only (the message keeps changing while
+    the request runs). They add `prefetch` and `prefetch_workers` to their
+    defaults."""
+
+    def fetch_key(self, message, **kwargs):
+        # type: (Message, **Any) -> Hashable
+        raise NotImplementedError
+
+    def fetch(self, key):
+        # type: (Hashable) -> Any
+        raise NotImplementedError
+
+    def prefetch(self, message, **kwargs):
+        # type: (Message, **Any) -> Optional[Prefetch]
+        if not self.component_config.get("prefetch"):
+            return None
+        key = self.fetch_key(message, **kwargs)
+        return Prefetch(key, self._prefetch_executor().submit(self.fetch, key))
+
+    def fetched(self, message, **kwargs):
+        # type: (Message, **Any) -> Any
+        key = self.fetch_key(message, **kwargs)
+        prefetched = kwargs.get("prefetched")
+        if prefetched is not None:
+            if prefetched.key == key:
+                return prefetched.future.result()
+            prefetched.future.cancel()
+        return self.fetch(key)
+
+    def _prefetch_executor(self):
+        # type: () -> ThreadPoolExecutor
+        executor = getattr(self, "_executor", None)
+        if executor is None:
+            with _executor_lock:
+                executor = getattr(self, "_executor", None)
+                if executor is None:
+                    executor = ThreadPoolExecutor(self.component_config.get("prefetch_workers", 4))
+                    self._executor = executor
+        return executor
+
+
+_executor_lock = Lock()
@@ -3,50 +3,168 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
+import os
+import re
 import requests
 import logging
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import partial
+from threading import BoundedSemaphore
 
 from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Text
 
 from rasa_nlu.components import Component
 from rasa_nlu.config import RasaNLUModelConfig
+from rasa_nlu.model import Metadata
+from rasa_nlu.training_data import TrainingData
 from rasa_nlu.training_data.message import Message
 
+from .circuit_breaker import CircuitBreaker
+from .http_session import pooled_session, LatencyStats
+from .lru_cache import LRUCache
+from .symspell import SymSpell
+
 logger = logging.getLogger(__name__)
 
 
-class BingSpellCheck(Component):
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _words(text):
+    # type: (Text) -> List[Text]
+    return [word.lower() for word in TOKEN_PATTERN.findall(text)]
+
+
+def _lookup_elements(table):
+    # type: (Dict[Text, Any]) -> List[Text]
+    """Elements of a lookup table, given as a list or as a file with one per line."""
+    elements = table['elements']
+    if isinstance(elements, list):
+        return elements
+    with io.open(elements, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _same_case(suggestion, token):
+    # type: (Text, Text) -> Text
+    if token.isupper() and len(token) > 1:
+        return suggestion.upper()
+    if token[0].isupper():
+        return suggestion[0].upper() + suggestion[1:]
+    return suggestion
+
+
+class SpellCheck(Component):
+    """Replaces the misspelled tokens of the text by their best suggestion,
+    if it scores above `min_score`. Subclasses find the misspelled tokens and
+    their suggestions, in the `flaggedTokens` format of the Bing spell check API."""
+
+    def process(self, message, **kwargs):
+        # type: (Message, **Any) -> None
+
+        text = message.text
+        tokens = self._flagged_tokens(text)
+
+        replacements = self._get_replacements(tokens)
+
+        if self.component_config.get('enabled', True):
+            message.text = self._replace(text, replacements)
+
+    def _flagged_tokens(self, text):
+        # type: (Text) -> List[Dict[Text, Any]]
+        raise NotImplementedError
+
+    @staticmethod
+    def _replace(text, replacements):
+        replacements.sort(key=lambda x: x['offset'])
+        start_next = len(text)
+
+        while len(replacements):
+            flagged_token = replacements.pop()
+
+            offset = flagged_token['offset']
+            token = flagged_token['token']
+            replacement = flagged_token['replacement']
+
+            if offset + len(token) <= start_next:
+                text = text[0:offset] + replacement + text[offset + len(token):]
+                start_next = offset
+
+        return text
+
+    def _get_replacements(self, tokens):
+        replacements = []
+        for flagged_token in tokens:
+
+            offset = flagged_token['offset']
+            token = flagged_token['token']
+            suggestions = sorted(flagged_token['suggestions'], key=lambda x: x['score'], reverse=True)
+
+            if len(suggestions) and suggestions[0]['score'] > self.component_config['min_score']:
+                replacements.append({
+                    'offset': offset,
+                    'token': token,
+                    'replacement': suggestions[0]['suggestion']
+                })
+
+        return replacements
+
+
+class BingSpellCheck(SpellCheck):
     name = 'components.botfront.spell_check.BingSpellCheck'
 
+    # skipped by the warm-up parses of a model when it is loaded
+    network_bound = True
+
     defaults = {
         'key': '',
         'min_score': 0.8,
         'language': 'en-US',
         'enabled': True,
+        'url': 'https://api.cognitive.microsoft.com/bing/v7.0/spellcheck/',
+        # seconds after which the text is left unchanged; a late response
+        # is still cached for the next messages
+        'deadline': 0.5,
+        # number of connections kept open, and of requests in flight: the
+        # text of the messages parsed while they are all in use is left unchanged
+        'pool_size': 10,
+        # number of (text, language) responses kept, 0 to disable
+        'cache_size': 1000,
+        # after this many consecutive failed requests, the spell check server
+        # is not called for `reset_timeout` seconds
+        'failure_threshold': 5,
+        'reset_timeout': 30.0,
     }
 
     def __init__(self, component_config=None):
         # type: (RasaNLUModelConfig) -> None
         super(BingSpellCheck, self).__init__(component_config)
 
-        self.url = 'https://api.cognitive.microsoft.com/bing/v7.0/spellcheck/'
+        self.url = self.component_config['url']
         self.header = {
             'Ocp-Apim-Subscription-Key': self.component_config['key'],
             'setLang': self.component_config['language'][:2],
         }
+        self.session = pooled_session(self.component_config['pool_size'])
+        self.cache = LRUCache(self.component_config['cache_size'])
+        self.latency = LatencyStats()
+        self.timeouts = 0
+        self.skipped = 0
+        self.circuit_breaker = CircuitBreaker(self.component_config['failure_threshold'],
+                                              self.component_config['reset_timeout'])
+        self._executor = ThreadPoolExecutor(self.component_config['pool_size'])
+        # late requests keep running after the deadline, at most `pool_size` of them
+        self._in_flight = BoundedSemaphore(self.component_config['pool_size'])
 
-    def process(self, message, **kwargs):
-        # type: (Message, **Any) -> None
-
-        text = message.text
-        response = self._response(text)
-        tokens = response.get('flaggedTokens', [])
-
-        replacements = self._get_replacements(tokens)
-
-        if self.component_config.get('enabled', True):
-            message.text = self._replace(text, replacements)
+    def _flagged_tokens(self, text):
+        return self._response(text).get('flaggedTokens', [])
 
     def _response(self, text):
         # type (str) -> dict
@@ -55,22 +173,84 @@ class BingSpellCheck(Component):
           'flaggedTokens': []
         }
 
+        key = (text, self.component_config['language'])
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        if not self._in_flight.acquire(blocking=False):
+            self.skipped += 1
+            logger.warning("Too many requests to the spell check server {} in flight, "
+                           "the text is left unchanged.".format(self.url))
+            return default_response
+        if not self.circuit_breaker.allow():
+            self._in_flight.release()
+            logger.debug("The spell check server is unavailable, skipping the request.")
+            return default_response
+
+        try:
+            future = self._executor.submit(self._request, text)
+        except Exception:
+            self._in_flight.release()
+            self.circuit_breaker.failure()
+            raise
+        future.add_done_callback(partial(self._cache_response, key))
         try:
-            response = requests.post(self.url, data=self._payload(text), headers=self.header)
+            response = future.result(timeout=self.component_config['deadline'])
+        except TimeoutError:
+            self.timeouts += 1
+            logger.warning("The spell check server {} did not respond within {}s, "
+                           "the text is left unchanged.".format(self.url, self.component_config['deadline']))
+            return default_response
+        return response if response is not None else default_response
+
+    def _cache_response(self, key, future):
+        if future.exception() is None and future.result() is not None:
+            self.cache.set(key, future.result())
+
+    def _request(self, text):
+        # type (str) -> Optional[dict]
+        """Posts the text to the spell check server, once a slot and the circuit breaker allowed it."""
+        start = time.time()
+        try:
+            # the deadline of `_response` is shorter, this only bounds the
+            # time a late request keeps a connection
+            response = self.session.post(self.url, data=self._payload(text), headers=self.header,
+                                         timeout=10 * self.component_config['deadline'])
             if response.status_code == 200:
-                return json.loads(response.text)
+                result = json.loads(response.text)
+                self.circuit_breaker.success()
+                return result
             else:
+                if response.status_code >= 500:
+                    self.circuit_breaker.failure()
+                else:
+                    self.circuit_breaker.success()
                 logger.error("Failed to get a proper response from spell check "
                              "server {}. Status Code: {}. Response: {}"
                              "".format(self.url, response.status_code, response.text))
-
-                return default_response
-        except requests.exceptions.ConnectionError as e:
+                return None
+        except requests.exceptions.RequestException as e:
+            self.circuit_breaker.failure()
             logger.error("Failed to connect to the spell check http server. "
                          "More information at "
                          "https://azure.microsoft.com/en-us/services/cognitive-services/spell-check/"
                          "Error: {}".format(e))
-            return default_response
+            return None
+        except Exception:
+            self.circuit_breaker.failure()
+            raise
+        finally:
+            self.latency.record(time.time() - start)
+            self._in_flight.release()
+
+    def stats(self):
+        # type: () -> Dict[Text, Any]
+        return {'cache': self.cache.stats(),
+                'latency': self.latency.stats(),
+                'timeouts': self.timeouts,
+                'skipped': self.skipped,
+                'circuit_breaker': self.circuit_breaker.stats()}
 
     def _payload(self, text):
         return {
@@ -79,37 +259,89 @@ class BingSpellCheck(Component):
             'mkt': self.component_config['language'],
         }
 
-    @staticmethod
-    def _replace(text, replacements):
-        replacements.sort(key=lambda x: x['offset'])
-        start_next = len(text)
 
-        while len(replacements):
-            flagged_token = replacements.pop()
+class SymSpellCheck(SpellCheck):
+    """Offline spell check against the vocabulary of the training data.
 
-            offset = flagged_token['offset']
-            token = flagged_token['token']
-            replacement = flagged_token['replacement']
+    The words of the training examples, lookup tables and fuzzy gazette are
+    indexed in a symmetric delete dictionary during training, and persisted
+    with the model. Unknown tokens are replaced by the closest, then most
+    frequent, word within `max_edit_distance`. A suggestion scores
+    1 - distance / length of the token."""
 
-            if offset + len(token) <= start_next:
-                text = text[0:offset] + replacement + text[offset + len(token):]
-                start_next = offset
+    name = 'components.botfront.spell_check.SymSpellCheck'
 
-        return text
+    # persisted as <file_prefix>.pkl
+    file_prefix = 'symspell'
 
-    def _get_replacements(self, tokens):
-        replacements = []
-        for flagged_token in tokens:
+    defaults = {
+        'min_score': 0.5,
+        'enabled': True,
+        'max_edit_distance': 2,
+        # shorter tokens are left unchanged
+        'min_token_length': 3,
+        'max_num_suggestions': 5,
+    }
 
-            offset = flagged_token['offset']
-            token = flagged_token['token']
-            suggestions = sorted(flagged_token['suggestions'], key=lambda x: x['score'], reverse=True)
+    def __init__(self, component_config=None, dictionary=None):
+        # type: (RasaNLUModelConfig, SymSpell) -> None
+        super(SymSpellCheck, self).__init__(component_config)
+        self.dictionary = dictionary if dictionary is not None \
+            else SymSpell(self.component_config['max_edit_distance'])
 
-            if len(suggestions) and suggestions[0]['score'] > self.component_config['min_score']:
-                replacements.append({
-                    'offset': offset,
+    def train(self, training_data, config, **kwargs):
+        # type: (TrainingData, RasaNLUModelConfig, **Any) -> None
+
+        dictionary = SymSpell(self.component_config['max_edit_distance'])
+        for example in training_data.training_examples:
+            dictionary.add(_words(example.text))
+        for table in training_data.lookup_tables:
+            dictionary.add(word for element in _lookup_elements(table) for word in _words(element))
+        for item in getattr(training_data, 'fuzzy_gazette', []):
+            dictionary.add(word for value in item['gazette'] for word in _words(value))
+        self.dictionary = dictionary
+
+    def _flagged_tokens(self, text):
+        flagged_tokens = []
+        for match in TOKEN_PATTERN.finditer(text):
+            token = match.group()
+            word = token.lower()
+            if len(word) < self.component_config['min_token_length'] or word.isdigit() or word in self.dictionary:
+                continue
+
+            suggestions = self.dictionary.lookup(word)[:self.component_config['max_num_suggestions']]
+            if suggestions:
+                flagged_tokens.append({
+                    'offset': match.start(),
                     'token': token,
-                    'replacement': suggestions[0]['suggestion']
+                    'type': 'UnknownToken',
+                    'suggestions': [{'suggestion': _same_case(suggestion, token),
+                                     'score': 1 - distance / len(word)}
+                                    for suggestion, distance, _ in suggestions],
                 })
+        return flagged_tokens
+
+    def persist(self, model_dir):
+        # type: (Text) -> Optional[Dict[Text, Any]]
+        from rasa_nlu.utils import pycloud_pickle
+        dictionary_file = self.file_prefix + '.pkl'
+        pycloud_pickle(os.path.join(model_dir, dictionary_file), self.dictionary)
+        return {'dictionary_file': dictionary_file}
+
+    @classmethod
+    def load(cls,
+             model_dir=None,   # type: Optional[Text]
+             model_metadata=None,   # type: Optional[Metadata]
+             cached_component=None,   # type: Optional[Component]
+             **kwargs  # type: **Any
+             ):
+        from rasa_nlu.utils import pycloud_unpickle
 
-        return replacements
\ No newline at end of file
+        meta = model_metadata.for_component(cls.name)
+        path = os.path.join(model_dir, meta.get('dictionary_file', cls.file_prefix + '.pkl'))
+        if os.path.isfile(path):
+            dictionary = pycloud_unpickle(path)
+        else:
+            dictionary = None
+            logger.warning("Failed to load spell check dictionary from '{}'".format(path))
+        return cls(meta, dictionary)
@@ -0,0 +1,82 @@
+from collections import Counter, deque
+
+import editdistance
+
+from typing import Iterable
+from typing import List
+from typing import Text
+from typing import Tuple
+
+
+def _deletes(word, max_distance):
+    # type: (Text, int) -> set
+    """`word` and every string obtained by deleting up to `max_distance` of its characters."""
+    deletes = {word}
+    queue = [word]
+    for _ in range(max_distance):
+        queue = [w[:i] + w[i + 1:] for w in queue for i in range(len(w))]
+        queue = [w for w in queue if w not in deletes]
+        deletes.update(queue)
+    return deletes
+
+
+class SymSpell(object):
+    """Symmetric delete spelling dictionary.
+
+    Every word is indexed under the strings obtained by deleting up to
+    `max_distance` characters from its first `prefix_length` characters. The
+    candidates for a misspelled token are then found by generating the
+    deletes of the token alone, and only those are checked with an edit
+    distance, so a lookup does not depend on the size of the vocabulary."""
+
+    def __init__(self, max_distance=2, prefix_length=7):
+        # type: (int, int) -> None
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = Counter()
+        self.deletes = {}
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.words
+
+    def add(self, words):
+        # type: (Iterable[Text]) -> None
+        for word in words:
+            if word not in self.words:
+                for delete in _deletes(word[:self.prefix_length], self.max_distance):
+                    self.deletes.setdefault(delete, []).append(word)
+            self.words[word] += 1
+
+    def lookup(self, token, max_distance=None):
+        # type: (Text, int) -> List[Tuple[Text, int, int]]
+        """Words within `max_distance` of `token`, as (word, distance, count)
+        by increasing distance, then decreasing count."""
+
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if token in self.words:
+            return [(token, 0, self.words[token])]
+
+        prefix = token[:self.prefix_length]
+        suggestions = {}
+        seen = {prefix}
+        queue = deque([prefix])
+        while queue:
+            candidate = queue.popleft()
+            for word in self.deletes.get(candidate, []):
+                if word not in suggestions and abs(len(word) - len(token)) <= max_distance:
+                    distance = editdistance.eval(token, word)
+                    if distance <= max_distance:
+                        suggestions[word] = distance
+            # candidates come by decreasing length, ie increasing number of deletes
+            if len(prefix) - len(candidate) < max_distance:
+                for i in range(len(candidate)):
+                    delete = candidate[:i] + candidate[i + 1:]
+                    if delete not in seen:
+                        seen.add(delete)
+                        queue.append(delete)
+
+        return sorted(((word, distance, self.words[word]) for word, distance in suggestions.items()),
+                      key=lambda s: (s[1], -s[2], s[0]))
@@ -0,0 +1,140 @@
+import hashlib
+import mmap
+import struct
+import weakref
+from bisect import bisect_left
+from collections.abc import Mapping
+
+import numpy as np
+from typing import Text
+
+from .atomic_file import atomic_path
+
+MAGIC = b"BFSY"
+VERSION = 1
+
+# magic, version, number of synonyms, sha1 of the content
+_PREFIX = struct.Struct("<4sIQ20s")
+_HEADER_SIZE = _PREFIX.size + (-_PREFIX.size % 8)
+
+_open_stores = weakref.WeakValueDictionary()
+
+
+def write_synonyms(path, synonyms):
+    # type: (Text, Mapping) -> None
+    """Writes synonyms in the binary format read by `SynonymStore`.
+
+    The keys, sorted by their UTF-8 encoding, and the values are stored in
+    two blobs, each indexed by an array of little-endian uint64 offsets. The
+    file is replaced atomically, so processes still mapping a previous
+    version of it keep reading consistent data."""
+
+    items = sorted((key.encode("utf-8"), value.encode("utf-8")) for key, value in synonyms.items())
+    keys = b"".join(key for key, _ in items)
+    values = b"".join(value for _, value in items)
+    key_offsets = np.zeros(len(items) + 1, dtype="<u8")
+    key_offsets[1:] = np.cumsum([len(key) for key, _ in items], dtype=np.uint64)
+    value_offsets = np.zeros(len(items) + 1, dtype="<u8")
+    value_offsets[1:] = np.cumsum([len(value) for _, value in items], dtype=np.uint64)
+
+    digest = hashlib.sha1()
+    for part in (key_offsets.tobytes(), value_offsets.tobytes(), keys, values):
+        digest.update(part)
+
+    with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(items), digest.digest()).ljust(_HEADER_SIZE, b"\0"))
+        for part in (key_offsets.tobytes(), value_offsets.tobytes(), keys, values):
+            f.write(part)
+
+
+class SynonymStore(Mapping):
+    """Read-only mapping of synonyms, memory-mapped from a file written by `write_synonyms`.
+
+    Keys are found by binary search and decoded on access, so the synonyms
+    take no memory besides the pages of the file in use, which are shared
+    by every model and process mapping it."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, self.digest = _PREFIX.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("'{}' is not a version {} synonyms file".format(path, VERSION))
+
+        self._count = count
+        # offsets are read as native uint64, which is little-endian on the platforms we run on
+        view = memoryview(self._buffer)
+        self._key_offsets = view[_HEADER_SIZE:_HEADER_SIZE + 8 * (count + 1)].cast("Q")
+        self._value_offsets = view[_HEADER_SIZE + 8 * (count + 1):_HEADER_SIZE + 16 * (count + 1)].cast("Q")
+        self._keys_start = _HEADER_SIZE + 16 * (count + 1)
+        self._values_start = self._keys_start + self._key_offsets[count]
+
+    def __len__(self):
+        return self._count
+
+    def _key(self, idx):
+        # type: (int) -> bytes
+        return self._buffer[self._keys_start + self._key_offsets[idx]:self._keys_start + self._key_offsets[idx + 1]]
+
+    def _value(self, idx):
+        # type: (int) -> Text
+        start = self._values_start + self._value_offsets[idx]
+        return self._buffer[start:self._values_start + self._value_offsets[idx + 1]].decode("utf-8")
+
+    def _find(self, key):
+        # type: (Text) -> int
+        if not isinstance(key, str):
+            return -1
+        encoded = key.encode("utf-8")
+        idx = bisect_left(_SortedKeys(self), encoded)
+        return idx if idx < self._count and self._key(idx) == encoded else -1
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def __getitem__(self, key):
+        idx = self._find(key)
+        if idx < 0:
+            raise KeyError(key)
+        return self._value(idx)
+
+    def __iter__(self):
+        for idx in range(self._count):
+            yield self._key(idx).decode("utf-8")
+
+    def items(self):
+        for idx in range(self._count):
+            yield self._key(idx).decode("utf-8"), self._value(idx)
+
+    def __repr__(self):
+        return "<SynonymStore of {} synonyms>".format(len(self))
+
+
+class _SortedKeys(object):
+    """Encoded keys of a store, as a sequence for `bisect`."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, idx):
+        return self._store._key(idx)
+
+
+def load_synonyms(path):
+    # type: (Text) -> SynonymStore
+    """Maps a synonyms file, reusing the mapping of any file with the same content."""
+
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+    if len(prefix) == _PREFIX.size:
+        store = _open_stores.get(_PREFIX.unpack(prefix)[3])
+        if store is not None:
+            return store
+
+    store = SynonymStore(path)
+    _open_stores[store.digest] = store
+    return store
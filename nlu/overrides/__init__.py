@@ -1,9 +1,13 @@
 import rasa_nlu.evaluate
+from rasa_nlu.components import ComponentBuilder
 from rasa_nlu.model import Interpreter
 from rasa_nlu.project import Project
 from overrides.loading import override_reader_factory
 from rasa_nlu.emulators import NoEmulator
+from rasa_nlu.extractors.duckling_http_extractor import DucklingHTTPExtractor
 from overrides import model as model_override
+from overrides.batch import add_process_batch
+from overrides import component_builder as component_builder_override
 from overrides import project as project_override
 from overrides.emulators__init__ import normalise_request_json
 from overrides.evaluate import run_evaluation, evaluate_intents, get_intent_predictions, IntentEvaluationResult
@@ -12,7 +16,30 @@ from overrides.evaluate import run_evaluation, evaluate_intents, get_intent_pred
 def monkey_patch():
     override_reader_factory()
     Interpreter.parse = model_override.parse
+    Interpreter.parse_batch = model_override.parse_batch
+    Interpreter.warm_up = model_override.warm_up
+    Interpreter.replay_side_effects = model_override.replay_side_effects
+    DucklingHTTPExtractor.network_bound = True
+    # resolves times relative to now, which must not be served from the cache
+    DucklingHTTPExtractor.cacheable = False
+    ComponentBuilder.load_component = component_builder_override.load_component
+    Project._loaded = {}
+    Project._loaded_generation = 0
+    Project._load_interpreter = project_override._load_interpreter
+    Project._invalidate_loaded = project_override._invalidate_loaded
+    Project._notify_models_changed = project_override._notify_models_changed
+    Project.on_models_changed = None
+    Project._search_for_models = project_override.search_for_models
+    # number of parses warming up models after they are loaded
+    Project.warm_up_texts = 0
+    Project._interpreter_for_model = project_override.interpreter_for_model
+    for method in ("update", "unload", "update_model_from_dir_and_unload_others"):
+        setattr(Project, method, project_override.invalidating_loaded(getattr(Project, method)))
     Project.parse = project_override.parse
+    Project.parse_batch = project_override.parse_batch
+    Project.update_gazette = project_override.update_gazette
+    Project.update_synonyms = project_override.update_synonyms
+    add_process_batch()
     NoEmulator.normalise_request_json = normalise_request_json
     rasa_nlu.evaluate.evaluate_intents = evaluate_intents
     rasa_nlu.evaluate.get_intent_predictions = get_intent_predictions
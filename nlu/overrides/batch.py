@@ -0,0 +1,95 @@
+"""`process_batch` implementations for the rasa components whose work can be
+vectorized, used by `Interpreter.parse_batch` (see overrides/model.py).
+
+Each one gives the same output as calling `process` on every message."""
+
+import numpy as np
+
+from rasa_nlu.classifiers import INTENT_RANKING_LENGTH
+from rasa_nlu.classifiers.embedding_intent_classifier import EmbeddingIntentClassifier
+from rasa_nlu.classifiers.sklearn_intent_classifier import SklearnIntentClassifier
+from rasa_nlu.featurizers.count_vectors_featurizer import CountVectorsFeaturizer
+from rasa_nlu.utils.spacy_utils import SpacyNLP
+
+
+def spacy_process_batch(self, messages, **kwargs):
+    texts = [m.text if self.component_config.get("case_sensitive") else m.text.lower() for m in messages]
+    for message, doc in zip(messages, self.nlp.pipe(texts)):
+        message.set("spacy_doc", doc)
+
+
+def count_vectors_process_batch(self, messages, **kwargs):
+    if self.vect is None:
+        for message in messages:
+            self.process(message, **kwargs)
+        return
+
+    bags = self.vect.transform([self._get_message_text(m) for m in messages]).toarray()
+    for message, bag in zip(messages, bags):
+        message.set("text_features", self._combine_with_existing_text_features(message, bag.squeeze()))
+
+
+def sklearn_process_batch(self, messages, **kwargs):
+    if not self.clf:
+        for message in messages:
+            self.process(message, **kwargs)
+        return
+
+    X = np.vstack([m.get("text_features").reshape(1, -1) for m in messages])
+    probabilities = self.predict_prob(X)
+    sorted_indices = np.fliplr(np.argsort(probabilities, axis=1))
+    for i, message in enumerate(messages):
+        intents = self.transform_labels_num2str(sorted_indices[i])
+        message_probabilities = probabilities[i, sorted_indices[i]]
+
+        if intents.size > 0 and message_probabilities.size > 0:
+            ranking = list(zip(list(intents), list(message_probabilities)))[:INTENT_RANKING_LENGTH]
+            intent = {"name": intents[0], "confidence": message_probabilities[0]}
+            intent_ranking = [{"name": intent_name, "confidence": score} for intent_name, score in ranking]
+        else:
+            intent = {"name": None, "confidence": 0.0}
+            intent_ranking = []
+
+        message.set("intent", intent, add_to_output=True)
+        message.set("intent_ranking", intent_ranking, add_to_output=True)
+
+
+def embedding_process_batch(self, messages, **kwargs):
+    if self.session is None:
+        for message in messages:
+            self.process(message, **kwargs)
+        return
+
+    X = np.vstack([m.get("text_features").reshape(1, -1) for m in messages])
+    all_Y = self._create_all_Y(X.shape[0])
+    # one row of similarities per message
+    message_sims = self.session.run(self.sim_op, feed_dict={self.a_in: X, self.b_in: all_Y})
+    for i, message in enumerate(messages):
+        message_sim = message_sims[i].flatten()
+        intent_ids = message_sim.argsort()[::-1]
+        message_sim[::-1].sort()
+
+        if self.similarity_type == 'cosine':
+            message_sim[message_sim < 0] = 0
+        elif self.similarity_type == 'inner':
+            message_sim = np.exp(message_sim)
+            message_sim /= np.sum(message_sim)
+        message_sim = message_sim.tolist()
+
+        intent = {"name": None, "confidence": 0.0}
+        intent_ranking = []
+        if X[i].any() and intent_ids.size > 0:
+            intent = {"name": self.inv_intent_dict[intent_ids[0]], "confidence": message_sim[0]}
+            ranking = list(zip(list(intent_ids), message_sim))[:INTENT_RANKING_LENGTH]
+            intent_ranking = [{"name": self.inv_intent_dict[intent_idx], "confidence": score}
+                              for intent_idx, score in ranking]
+
+        message.set("intent", intent, add_to_output=True)
+        message.set("intent_ranking", intent_ranking, add_to_output=True)
+
+
+def add_process_batch():
+    SpacyNLP.process_batch = spacy_process_batch
+    CountVectorsFeaturizer.process_batch = count_vectors_process_batch
+    SklearnIntentClassifier.process_batch = sklearn_process_batch
+    EmbeddingIntentClassifier.process_batch = embedding_process_batch
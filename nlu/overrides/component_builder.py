@@ -0,0 +1,29 @@
+from threading import Lock
+
+from rasa_nlu.components import ComponentBuilder
+
+_rasa_load_component = ComponentBuilder.load_component
+
+_cache_key_locks_lock = Lock()
+
+
+def _cache_key_lock(builder, cache_key):
+    with _cache_key_locks_lock:
+        locks = builder.__dict__.setdefault("_cache_key_locks", {})
+        return locks.setdefault(cache_key, Lock())
+
+
+def load_component(self, component_name, model_dir, model_metadata, **context):
+    """Loads components sharing a cache key (spaCy, MITIE...) one at a time.
+
+    The component cache has no lock: models loaded concurrently, as when
+    projects are preloaded, would each miss it and load their own copy of
+    the language model."""
+    from rasa_nlu import registry
+
+    cache_key = registry.get_component_class(component_name).cache_key(model_metadata)
+    if cache_key is None or not self.use_cache:
+        return _rasa_load_component(self, component_name, model_dir, model_metadata, **context)
+
+    with _cache_key_lock(self, cache_key):
+        return _rasa_load_component(self, component_name, model_dir, model_metadata, **context)
@@ -3,16 +3,193 @@ from rasa_nlu.data_router import DataRouter
 from rasa_nlu.project import Project
 from rasa_nlu.model import InvalidProjectError
 from rasa_nlu.config import RasaNLUModelConfig
+from overrides.micro_batcher import MicroBatcher
+from overrides.preload import PreloadProgress
+from overrides.residency import ModelResidency
+from overrides.response_cache import ResponseCache, UNCACHEABLE
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+import json
 import logging
+import time
 logger = logging.getLogger(__name__)
 
 
+# request parameters which do not change how the pipeline parses a text
+NON_PIPELINE_PARAMS = {"q", "query", "text"}
+
+
 class BFDataRouter(DataRouter):
 
+    def __init__(self, *args, **kwargs):
+        # concurrent parse requests of a project model are parsed together by batches of up
+        # to `micro_batch_size` texts, waiting at most `micro_batch_wait` seconds for a batch
+        micro_batch_size = kwargs.pop("micro_batch_size", 1)
+        micro_batch_wait = kwargs.pop("micro_batch_wait", 0.003)
+        # least recently used models are unloaded when the loaded ones take more than
+        # `memory_budget_mb` (0 for no limit), except the `pinned_models`
+        self.residency = ModelResidency(kwargs.pop("memory_budget_mb", 0), kwargs.pop("pinned_models", None))
+        # number of projects loaded concurrently by `_pre_load`
+        self.preload_workers = kwargs.pop("preload_workers", 4)
+        # whether the server is only ready once every preloaded project is loaded,
+        # rather than loaded or failed to load
+        self.preload = PreloadProgress(kwargs.pop("preload_require_all", False))
+        # responses of up to `response_cache_size` parse requests (0 to disable) are
+        # reused for `response_cache_ttl` seconds
+        response_cache_size = kwargs.pop("response_cache_size", 0)
+        response_cache_ttl = kwargs.pop("response_cache_ttl", 60.0)
+        self.response_cache = ResponseCache(response_cache_size, response_cache_ttl) if response_cache_size else None
+        # projects report the models they load or unload, for the budget to be enforced again;
+        # set on the class as projects are also created by rasa's DataRouter
+        Project.on_models_changed = self.residency.models_changed
+        super(BFDataRouter, self).__init__(*args, **kwargs)
+
+        self.micro_batcher = None
+        if micro_batch_size > 1:
+            self.micro_batcher = MicroBatcher(self._parse_micro_batch, micro_batch_size, micro_batch_wait)
+
     def parse(self, data, request_params=None):
         project = data.get("project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
         model = data.get("model")
 
+        self._ensure_project(project)
+
+        time = data.get('time')
+        params = {k: v for k, v in (request_params or {}).items() if k not in NON_PIPELINE_PARAMS}
+        key = (project, model, json.dumps(time, default=str), json.dumps(params, sort_keys=True, default=str))
+
+        if self.response_cache and data['text']:
+            # loading, updating or unloading models of the project changes its generation
+            cache_key = key + (self.project_store[project]._loaded_generation, data['text'])
+            response = self.response_cache.get_or_parse(
+                cache_key, lambda: self._parse(key, data, request_params),
+                lambda reused: self._replay_side_effects(project, reused, data.get('time'), request_params))
+        else:
+            response = self._parse(key, data, request_params)
+            response.pop(UNCACHEABLE, None)
+        self._used_model(project, response.get('model'))
+
+        if self.responses:
+            self.responses.info('', user_input=response, project=project,
+                                model=response.get('model'))
+
+        return self.format_response(response)
+
+    def _parse(self, key, data, request_params):
+        if self.micro_batcher and data['text']:
+            return self.micro_batcher.submit(key, (data, request_params))
+        project = data.get("project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+        return self.project_store[project].parse(data['text'], data.get('time'),
+                                                 data.get("model"), request_params=request_params)
+
+    def _replay_side_effects(self, project, response, time, request_params):
+        interpreter = self.project_store[project]._models.get(response.get('model'))
+        if interpreter is not None:
+            interpreter.replay_side_effects(response, time, request_params)
+
+    def _parse_micro_batch(self, items):
+        # the requests of a micro batch only differ by their text
+        data, request_params = items[0]
+        project = data.get("project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+        return self.project_store[project].parse_batch([d['text'] for d, _ in items], data.get('time'),
+                                                       data.get("model"), request_params=request_params)
+
+    def _used_model(self, project, model):
+        self.residency.touch(project, model)
+        if self.residency.changed:
+            self.residency.enforce(self.project_store)
+
+    def _pre_load(self, projects):
+        projects = [project for project in self.project_store if project in projects]
+        logger.debug("loading %s", projects)
+        self.preload.start(projects)
+
+        with ThreadPoolExecutor(max_workers=self.preload_workers) as pool:
+            for project in projects:
+                pool.submit(self._pre_load_project, project)
+
+        self.residency.enforce(self.project_store)
+
+    def _pre_load_project(self, project):
+        start = time.time()
+        try:
+            self.project_store[project].load_model()
+        except Exception as e:
+            logger.exception(e)
+            self.preload.project_failed(project, e)
+        else:
+            self.preload.project_loaded(project, time.time() - start)
+
+    def pre_load_in_background(self, projects):
+        """Preloads projects while the server starts, it is not ready until they are loaded."""
+        self.preload.start(projects)
+        thread = Thread(target=self._pre_load, args=(projects,), name="Preload", daemon=True)
+        thread.start()
+        return thread
+
+    def get_status(self):
+        status = super(BFDataRouter, self).get_status()
+        status["resident_models"] = self.residency.stats()
+        status["preload"] = self.preload.stats()
+        status["warm_up_seconds"] = {
+            name: {model: interpreter.warm_up_seconds for model, interpreter in list(project._models.items())
+                   if getattr(interpreter, "warm_up_seconds", None) is not None}
+            for name, project in list(self.project_store.items())
+        }
+        if self.micro_batcher:
+            status["micro_batching"] = self.micro_batcher.stats()
+        if self.response_cache:
+            status["response_cache"] = self.response_cache.stats()
+        return status
+
+    def parse_batch(self, data, request_params=None):
+        project = data.get("project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+        model = data.get("model")
+
+        self._ensure_project(project)
+
+        texts = data['q'] if isinstance(data['q'], list) else [data['q']]
+        responses = self.project_store[project].parse_batch(texts, data.get('time'),
+                                                            model, request_params=request_params)
+        for response in responses:
+            response.pop(UNCACHEABLE, None)
+        if responses:
+            self._used_model(project, responses[0].get('model'))
+
+        if self.responses:
+            for response in responses:
+                self.responses.info('', user_input=response, project=project,
+                                    model=response.get('model'))
+
+        return [self.format_response(response) for response in responses]
+
+    def update_gazette(self, data):
+        project = data.get("project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+
+        self._ensure_project(project)
+
+        response = self.project_store[project].update_gazette(data['entity'],
+                                                              data.get('add', []),
+                                                              data.get('remove', []),
+                                                              data.get('model'))
+        if self.response_cache:
+            self.response_cache.clear()
+        return response
+
+    def update_synonyms(self, data):
+        project = data.get("project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+
+        self._ensure_project(project)
+
+        response = self.project_store[project].update_synonyms(data.get('add', {}),
+                                                               data.get('remove', []),
+                                                               data.get('reload', False),
+                                                               data.get('model'))
+        if self.response_cache:
+            self.response_cache.clear()
+        return response
+
+    def _ensure_project(self, project):
         if project not in self.project_store:
             projects = self._list_projects(self.project_dir)
 
@@ -31,13 +208,3 @@ class BFDataRouter(DataRouter):
                     raise InvalidProjectError(
                         "Unable to load project '{}'. "
                         "Error: {}".format(project, e))
-
-        time = data.get('time')
-        response = self.project_store[project].parse(data['text'], time,
-                                                     model, request_params=request_params)
-
-        if self.responses:
-            self.responses.info('', user_input=response, project=project,
-                                model=response.get('model'))
-
-        return self.format_response(response)
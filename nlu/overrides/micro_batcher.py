@@ -0,0 +1,99 @@
+import time
+from threading import Event, Lock
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Text
+
+
+class _Batch(object):
+
+    def __init__(self):
+        self.items = []
+        self.results = None
+        self.error = None
+        self.full = Event()
+        self.done = Event()
+
+
+class MicroBatcher(object):
+    """Groups the items submitted concurrently under the same key into batches.
+
+    The first thread submitting an item for a key waits up to `max_wait`
+    seconds, or until `max_batch_size` items are submitted, then runs
+    `run_batch` on the items of the batch for every thread of the batch."""
+
+    def __init__(self,
+                 run_batch,  # type: Callable[[List[Any]], List[Any]]
+                 max_batch_size=16,  # type: int
+                 max_wait=0.003,  # type: float
+                 ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.full_batches = 0
+        self.run_time = 0.0
+        self._pending = {}
+        self._lock = Lock()
+
+    def submit(self, key, item):
+        # type: (Hashable, Any) -> Any
+        with self._lock:
+            batch = self._pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._pending[key] = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                del self._pending[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+            self._run(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
+
+    def _run(self, batch):
+        # type: (_Batch) -> None
+        start = time.time()
+        try:
+            batch.results = self.run_batch(batch.items)
+        except Exception as e:
+            batch.error = e
+        finally:
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch.items)
+                self.largest_batch = max(self.largest_batch, len(batch.items))
+                self.full_batches += len(batch.items) >= self.max_batch_size
+                self.run_time += time.time() - start
+            batch.done.set()
+
+    def stats(self):
+        # type: () -> Dict[Text, Any]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "requests": self.items,
+            "full_batches": self.full_batches,
+            "largest_batch": self.largest_batch,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "mean_batch_ms": self.run_time * 1000 / self.batches if self.batches else 0.0,
+        }
@@ -1,5 +1,31 @@
+import io
+import json
+import logging
+import os
+import time
+
 from rasa_nlu.training_data import Message
 
+from overrides.response_cache import UNCACHEABLE
+
+logger = logging.getLogger(__name__)
+
+# parsed to warm up a model without training examples, or with fewer than requested
+SYNTHETIC_TEXTS = [
+    "hello",
+    "I would like to book a table for 2 people tomorrow at 8pm",
+    "what is the weather like in New York this weekend?",
+    "no thanks",
+    "can you send it to john@example.com before 10:30",
+]
+
+
+def is_cacheable(interpreter, message):
+    # type: (Interpreter, Message) -> bool
+    """Whether the response to a message can be cached (see overrides/response_cache.py):
+    no component marked it `UNCACHEABLE`, and none opted out with `cacheable = False`."""
+    return not message.get(UNCACHEABLE) and all(getattr(c, "cacheable", True) for c in interpreter.pipeline)
+
 
 def parse(self, text, time=None, only_output_properties=True, request_params=None):
     # type: (Text) -> Dict[Text, Any]
@@ -18,10 +44,112 @@ def parse(self, text, time=None, only_output_properties=True, request_params=Non
 
     message = Message(text, self.default_output_attributes(), time=time)
 
-    for component in self.pipeline:
-        component.process(message, **self.context, request_params=request_params)
+    # network-bound components start their requests now and join them
+    # when they process the message (see components.botfront.prefetch)
+    prefetched = {}
+    for i, component in enumerate(self.pipeline):
+        if hasattr(component, "prefetch"):
+            prefetched[i] = component.prefetch(message, **self.context, request_params=request_params)
+
+    for i, component in enumerate(self.pipeline):
+        if prefetched.get(i) is not None:
+            component.process(message, **self.context, request_params=request_params,
+                              prefetched=prefetched[i])
+        else:
+            component.process(message, **self.context, request_params=request_params)
 
     output = self.default_output_attributes()
     output.update(message.as_dict(
         only_output_properties=only_output_properties))
+    if not is_cacheable(self, message):
+        output[UNCACHEABLE] = True
     return output
+
+
+def replay_side_effects(self, response, time=None, request_params=None):
+    # type: (Dict[Text, Any], Any, Optional[Dict[Text, Any]]) -> None
+    """Runs the components with side effects (`side_effects = True`, e.g. the
+    activity logger) on a response reused from the cache, as on a parsed one.
+
+    The message they process is rebuilt from the final response."""
+    components = [c for c in self.pipeline if getattr(c, "side_effects", False)]
+    if not components:
+        return
+
+    data = {k: v for k, v in response.items() if k not in ("text", "project", "model")}
+    message = Message(response.get("text", ""), data, output_properties=set(data), time=time)
+    for component in components:
+        component.process(message, **self.context, request_params=request_params)
+
+
+def parse_batch(self, texts, time=None, only_output_properties=True, request_params=None):
+    # type: (List[Text]) -> List[Dict[Text, Any]]
+    """Parse a list of texts through the pipeline at once.
+
+    Components with a `process_batch` method (see overrides/batch.py)
+    process all the messages together, the others each message in turn."""
+
+    messages = [Message(text, self.default_output_attributes(), time=time) for text in texts if text]
+
+    if messages:
+        for component in self.pipeline:
+            if hasattr(component, "process_batch"):
+                component.process_batch(messages, **self.context, request_params=request_params)
+                continue
+
+            prefetched = ([component.prefetch(m, **self.context, request_params=request_params) for m in messages]
+                          if hasattr(component, "prefetch") else [None] * len(messages))
+            for message, fetched in zip(messages, prefetched):
+                if fetched is not None:
+                    component.process(message, **self.context, request_params=request_params,
+                                      prefetched=fetched)
+                else:
+                    component.process(message, **self.context, request_params=request_params)
+
+    outputs = []
+    parsed = iter(messages)
+    for text in texts:
+        output = self.default_output_attributes()
+        if text:
+            message = next(parsed)
+            output.update(message.as_dict(only_output_properties=only_output_properties))
+            if not is_cacheable(self, message):
+                output[UNCACHEABLE] = True
+        else:
+            output["text"] = ""
+        outputs.append(output)
+    return outputs
+
+
+def warm_up_texts(model_metadata, count):
+    # type: (Metadata, int) -> List[Text]
+    """Up to `count` training examples of a model, completed with synthetic texts."""
+    texts = []
+    file_name = model_metadata.get("training_data")
+    if file_name and model_metadata.model_dir:
+        try:
+            with io.open(os.path.join(model_metadata.model_dir, file_name), encoding="utf-8") as f:
+                examples = json.load(f).get("rasa_nlu_data", {}).get("common_examples", [])
+            step = max(1, len(examples) // count)
+            texts = [e["text"] for e in examples[::step] if e.get("text")][:count]
+        except (IOError, ValueError) as e:
+            logger.warning("Could not read the training examples to warm up the model: {}".format(e))
+    return texts + [SYNTHETIC_TEXTS[i % len(SYNTHETIC_TEXTS)] for i in range(count - len(texts))]
+
+
+def warm_up(self, texts):
+    # type: (List[Text]) -> float
+    """Parses `texts` so that the components initialize lazily loaded resources
+    before the model serves requests. Network-bound components are skipped.
+
+    Returns the time it took, in seconds."""
+    start = time.time()
+    pipeline = [component for component in self.pipeline if not getattr(component, "network_bound", False)]
+    try:
+        for text in texts:
+            message = Message(text, self.default_output_attributes())
+            for component in pipeline:
+                component.process(message, **self.context)
+    except Exception as e:
+        logger.warning("Warming up the model failed: {}".format(e))
+    return time.time() - start
@@ -0,0 +1,75 @@
+import logging
+import time
+from threading import Lock
+
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Text
+
+logger = logging.getLogger(__name__)
+
+
+class PreloadProgress(object):
+    """Progress of the projects loaded when the server starts.
+
+    The server is ready once every project is loaded or failed to load: the
+    failed ones are reported, and loaded again by their first parse request.
+    With `require_all`, the server is only ready once every project is
+    loaded, so a project failing to load keeps it from being ready."""
+
+    def __init__(self, require_all=False):
+        # type: (bool) -> None
+        self.require_all = require_all
+        self.projects = []
+        self.loaded = {}
+        self.failed = {}
+        self.started = None
+        self.finished = None
+        self._lock = Lock()
+
+    def start(self, projects):
+        # type: (Iterable[Text]) -> None
+        with self._lock:
+            self.projects = list(projects)
+            self.loaded = {}
+            self.failed = {}
+            self.started = time.time()
+            self.finished = None if self.projects else self.started
+
+    def project_loaded(self, project, seconds):
+        # type: (Text, float) -> None
+        with self._lock:
+            self.loaded[project] = seconds
+            done = len(self.loaded) + len(self.failed)
+            self._finish_if_done(done)
+        logger.info("Preloaded project {} in {:.1f}s ({}/{})".format(project, seconds, done, len(self.projects)))
+
+    def project_failed(self, project, error):
+        # type: (Text, Exception) -> None
+        with self._lock:
+            self.failed[project] = "{}".format(error)
+            done = len(self.loaded) + len(self.failed)
+            self._finish_if_done(done)
+        logger.error("Failed to preload project {} ({}/{}): {}".format(project, done, len(self.projects), error))
+
+    def _finish_if_done(self, done):
+        if done == len(self.projects):
+            self.finished = time.time()
+
+    def is_ready(self):
+        # type: () -> bool
+        done = len(self.loaded) if self.require_all else len(self.loaded) + len(self.failed)
+        return done == len(self.projects)
+
+    def stats(self):
+        # type: () -> Dict[Text, Any]
+        with self._lock:
+            return {
+                "ready": self.is_ready(),
+                "total": len(self.projects),
+                "loaded": len(self.loaded),
+                "failed": dict(self.failed),
+                "seconds": dict(self.loaded),
+                "elapsed": ((self.finished or time.time()) - self.started) if self.started else 0.0,
+            }
@@ -1,20 +1,162 @@
-def parse(self, text, time=None, requested_model_name=None, request_params=None):
-    self._begin_read()
+import logging
+
+from rasa_nlu.project import Project
+
+from overrides.model import warm_up_texts
+
+logger = logging.getLogger(__name__)
+
+_rasa_search_for_models = Project._search_for_models
+_rasa_interpreter_for_model = Project._interpreter_for_model
+
+
+def _load_interpreter(self, requested_model_name=None):
+    """Name and interpreter of the requested model, loaded if needed, for a reader
+    of the project (between `_begin_read` and `_end_read`).
+
+    The interpreter is also published in `_loaded`, a dict replaced on every
+    change and never mutated, which `parse` reads without taking any lock.
+    It is emptied by `_invalidate_loaded` when models are updated or unloaded."""
+    generation = self._loaded_generation
 
     model_name = self._dynamic_load_model(requested_model_name)
 
     self._loader_lock.acquire()
     try:
         if not self._models.get(model_name):
-            interpreter = self._interpreter_for_model(model_name)
-            self._models[model_name] = interpreter
+            self._models[model_name] = self._interpreter_for_model(model_name)
+            self._notify_models_changed()
+        interpreter = self._models[model_name]
+        # models not found are not published, they resolve to the latest model
+        if generation == self._loaded_generation and requested_model_name in (None, model_name):
+            loaded = dict(self._loaded)
+            loaded[requested_model_name] = (model_name, interpreter)
+            self._loaded = loaded
     finally:
         self._loader_lock.release()
 
-    response = self._models[model_name].parse(text, time, request_params=request_params)
+    return model_name, interpreter
+
+
+def _invalidate_loaded(self):
+    with self._loader_lock:
+        self._loaded_generation += 1
+        self._loaded = {}
+    self._notify_models_changed()
+
+
+def _notify_models_changed(self):
+    """Calls `Project.on_models_changed` when models are loaded or unloaded."""
+    if self.on_models_changed is not None:
+        self.on_models_changed()
+
+
+def parse(self, text, time=None, requested_model_name=None, request_params=None):
+    loaded = self._loaded.get(requested_model_name)
+    if loaded is not None:
+        # fast path: the model is loaded, no lock is needed
+        model_name, interpreter = loaded
+        response = interpreter.parse(text, time, request_params=request_params)
+    else:
+        self._begin_read()
+        try:
+            model_name, interpreter = self._load_interpreter(requested_model_name)
+            response = interpreter.parse(text, time, request_params=request_params)
+        finally:
+            self._end_read()
+
     response['project'] = self._project
     response['model'] = model_name
 
-    self._end_read()
+    return response
+
+
+def update_gazette(self, entity, add=None, remove=None, requested_model_name=None):
+    """Applies gazette additions and removals to the components of a loaded model,
+    and persists the updated components in the model directory."""
+    self._begin_read()
+
+    try:
+        model_name, interpreter = self._load_interpreter(requested_model_name)
+        counts = {}
+        for component in interpreter.pipeline:
+            if hasattr(component, "update_gazette"):
+                counts[component.name] = component.update_gazette(entity, add, remove)
+                component.persist(interpreter.model_metadata.model_dir)
+    finally:
+        self._end_read()
+
+    return {"project": self._project, "model": model_name, "entity": entity, "counts": counts}
+
+
+def update_synonyms(self, add=None, remove=None, reload=False, requested_model_name=None):
+    """Patches the synonyms of a loaded model (or maps them again from the model
+    directory if `reload`), without reloading its interpreter."""
+    self._begin_read()
+
+    try:
+        model_name, interpreter = self._load_interpreter(requested_model_name)
+        model_dir = interpreter.model_metadata.model_dir
+        counts = {}
+        for component in interpreter.pipeline:
+            if reload and hasattr(component, "reload_synonyms"):
+                counts[component.name] = component.reload_synonyms(model_dir)
+            elif hasattr(component, "update_synonyms"):
+                counts[component.name] = component.update_synonyms(model_dir, add, remove)
+    finally:
+        self._end_read()
+
+    return {"project": self._project, "model": model_name, "counts": counts}
+
+
+def parse_batch(self, texts, time=None, requested_model_name=None, request_params=None):
+    loaded = self._loaded.get(requested_model_name)
+    if loaded is not None:
+        model_name, interpreter = loaded
+        responses = interpreter.parse_batch(texts, time, request_params=request_params)
+    else:
+        self._begin_read()
+        try:
+            model_name, interpreter = self._load_interpreter(requested_model_name)
+            responses = interpreter.parse_batch(texts, time, request_params=request_params)
+        finally:
+            self._end_read()
+
+    for response in responses:
+        response['project'] = self._project
+        response['model'] = model_name
+
+    return responses
+
+
+def invalidating_loaded(method):
+    """Wraps a `Project` method changing the loaded models to empty `_loaded` after it."""
+
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._invalidate_loaded()
+
+    return wrapper
+
+
+def search_for_models(self):
+    # the model list only changes the latest model, and the model of requests for unknown
+    # models, which are frequent and must not empty `_loaded` every time
+    models = set(self._models)
+    _rasa_search_for_models(self)
+    if set(self._models) != models:
+        self._invalidate_loaded()
+
 
-    return response
\ No newline at end of file
+def interpreter_for_model(self, model_name, model_dir=None):
+    """Loads an interpreter and warms it up with `Project.warm_up_texts` parses
+    before it serves requests."""
+    interpreter = _rasa_interpreter_for_model(self, model_name, model_dir)
+    if self.warm_up_texts:
+        texts = warm_up_texts(interpreter.model_metadata, self.warm_up_texts)
+        interpreter.warm_up_seconds = interpreter.warm_up(texts)
+        logger.info("Warmed up model {} of project {} with {} parses in {:.2f}s"
+                    "".format(model_name, self._project, len(texts), interpreter.warm_up_seconds))
+    return interpreter
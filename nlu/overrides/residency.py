@@ -0,0 +1,154 @@
+import logging
+import os
+import time
+from threading import Lock
+
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Text
+
+from rasa_nlu.project import FALLBACK_MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+
+def model_size(interpreter):
+    # type: (Any) -> int
+    """Bytes of the files of a model, a rough proxy for the memory it takes once loaded.
+
+    It is only good for comparing models and setting a budget from observed
+    usage: TensorFlow and sklearn models can take several times the size of
+    their files in memory, and memory-mapped files (binary gazettes, synonyms)
+    are shared between processes. Resources shared between models (spaCy,
+    MITIE...) are cached by the component builder and not stored with the
+    model, so they are not counted. The resident memory of the process is not
+    measured around loads because projects are loaded concurrently."""
+    if not _has_model_dir(interpreter):
+        return 0
+    model_dir = interpreter.model_metadata.model_dir
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(model_dir) for f in files)
+
+
+def _has_model_dir(interpreter):
+    # type: (Any) -> bool
+    model_dir = getattr(interpreter.model_metadata, "model_dir", None)
+    return bool(model_dir) and os.path.isdir(model_dir)
+
+
+class _Resident(object):
+
+    def __init__(self, project, interpreter, size, pinned):
+        self.project = project
+        self.interpreter = interpreter
+        self.size = size
+        self.pinned = pinned
+        self.last_used = time.time()
+
+
+class ModelResidency(object):
+    """Keeps the size of the models loaded by projects under a memory budget
+    by unloading the least recently used ones.
+
+    `pinned` models ("project" for all the models of a project, or
+    "project/model") are never unloaded, nor the models of projects pulling
+    them from a model server, which are not kept in the project directory to
+    be loaded again. Neither are the fallback model of untrained projects and
+    the other models without a model directory, which could not be loaded
+    again. A budget of 0 only accounts for the models.
+
+    The models are only accounted for again once `models_changed` was called
+    after models were loaded or unloaded."""
+
+    def __init__(self, budget_mb=0, pinned=None):
+        # type: (float, Optional[Iterable[Text]]) -> None
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.pinned = set(pinned or [])
+        self.evictions = 0
+        self.changed = True
+        self._residents = {}
+        self._lock = Lock()
+
+    def is_pinned(self, project, model):
+        # type: (Text, Text) -> bool
+        return project in self.pinned or "{}/{}".format(project, model) in self.pinned
+
+    def _never_unloaded(self, key, project, interpreter):
+        return (self.is_pinned(*key) or bool(project.pull_models) or
+                key[1] == FALLBACK_MODEL_NAME or not _has_model_dir(interpreter))
+
+    def models_changed(self):
+        self.changed = True
+
+    def touch(self, project, model):
+        # type: (Text, Text) -> None
+        resident = self._residents.get((project, model))
+        if resident is not None:
+            resident.last_used = time.time()
+
+    def used(self):
+        # type: () -> int
+        with self._lock:
+            return self._used()
+
+    def _used(self):
+        return sum(r.size for r in self._residents.values())
+
+    def enforce(self, projects):
+        # type: (Dict[Text, Any]) -> None
+        """Accounts for the models loaded by `projects`, then unloads the least
+        recently used ones until the loaded models fit the budget.
+
+        Must not be called by a reader of a project, as unloading waits for
+        the project readers."""
+        # models changed while they are accounted for are accounted for by the next call
+        self.changed = False
+        loaded = {(name, model): (project, interpreter)
+                  for name, project in list(projects.items())
+                  for model, interpreter in list(project._models.items()) if interpreter is not None}
+
+        evicted = []
+        with self._lock:
+            for key in list(self._residents):
+                if loaded.get(key, (None, None))[1] is not self._residents[key].interpreter:
+                    del self._residents[key]
+            for key, (project, interpreter) in loaded.items():
+                if key not in self._residents:
+                    self._residents[key] = _Resident(project, interpreter, model_size(interpreter),
+                                                     self._never_unloaded(key, project, interpreter))
+
+            if not self.budget or self._used() <= self.budget:
+                return
+
+            candidates = sorted((r.last_used, key) for key, r in self._residents.items() if not r.pinned)
+            # the model used last is kept even if it does not fit
+            for _, key in candidates[:-1]:
+                if self._used() <= self.budget:
+                    break
+                evicted.append((key, self._residents.pop(key)))
+            self.evictions += len(evicted)
+
+        # unloading waits for the readers of the project
+        for (project_name, model), resident in evicted:
+            logger.info("Unloading model {} of project {} ({:.1f} MB) to fit the memory budget"
+                        "".format(model, project_name, resident.size / 1024.0 / 1024.0))
+            resident.project.unload(model)
+
+    def stats(self):
+        # type: () -> Dict[Text, Any]
+        now = time.time()
+        with self._lock:
+            residents = sorted(self._residents.items())
+        return {
+            "budget_mb": self.budget / 1024.0 / 1024.0,
+            "used_mb": sum(r.size for _, r in residents) / 1024.0 / 1024.0,
+            "evictions": self.evictions,
+            "models": [{
+                "project": key[0],
+                "model": key[1],
+                "size_mb": r.size / 1024.0 / 1024.0,
+                "pinned": r.pinned,
+                "idle_s": now - r.last_used,
+            } for key, r in residents],
+        }
@@ -0,0 +1,94 @@
+import time
+from copy import deepcopy
+from threading import Event, Lock
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+from typing import Text
+
+from components.botfront import UNCACHEABLE
+from components.botfront.lru_cache import LRUCache
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.response = None
+        self.error = None
+        self.done = Event()
+
+
+class ResponseCache(object):
+    """Bounded cache of parse responses, with a TTL.
+
+    Concurrent requests for the same key are coalesced: the first one runs
+    the pipeline, the others wait for its response. Responses marked with
+    `UNCACHEABLE` are returned but not cached."""
+
+    def __init__(self, maxsize=10000, ttl=60.0, clock=time.monotonic):
+        # type: (int, float, Callable[[], float]) -> None
+        self.cache = LRUCache(maxsize, ttl, clock)
+        self.coalesced = 0
+        self.uncacheable = 0
+        self._in_flight = {}
+        self._lock = Lock()
+
+    def get_or_parse(self,
+                     key,  # type: Hashable
+                     parse,  # type: Callable[[], Dict[Text, Any]]
+                     reused=None,  # type: Optional[Callable[[Dict[Text, Any]], None]]
+                     ):
+        # type: (...) -> Dict[Text, Any]
+        """The response of `key`, from the cache or from `parse`.
+
+        `reused` is called with the responses not parsed for this call: the
+        cached ones, and those of the concurrent call that ran `parse`."""
+        response = self.cache.get(key)
+        if response is not None:
+            response = deepcopy(response)
+            if reused is not None:
+                reused(response)
+            return response
+
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.response = parse()
+                if call.response.pop(UNCACHEABLE, False):
+                    self.uncacheable += 1
+                else:
+                    self.cache.set(key, call.response)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        response = deepcopy(call.response)
+        if not leader and reused is not None:
+            reused(response)
+        return response
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        # type: () -> Dict[Text, Any]
+        stats = self.cache.stats()
+        stats.update({"ttl": self.cache.ttl, "coalesced": self.coalesced, "uncacheable": self.uncacheable})
+        return stats
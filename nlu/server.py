@@ -7,6 +7,7 @@ import simplejson
 from twisted.internet import threads
 from twisted.internet.defer import returnValue
 
+from rasa_nlu.project import Project
 from rasa_nlu.utils import read_endpoints
 from rasa_nlu import utils
 from rasa_nlu.server import create_argument_parser
@@ -56,14 +57,151 @@ class BFRasaNLU(RasaNLU):
                 logger.exception(e)
                 returnValue(json_to_string({"error": "{}".format(e)}))
 
+    @RasaNLU.app.route("/ready", methods=['GET', 'OPTIONS'])
+    @check_cors
+    def ready(self, request):
+        request.setHeader('Content-Type', 'application/json')
+        status = self.data_router.preload.stats()
+        request.setResponseCode(200 if status["ready"] else 503)
+        return json_to_string(status)
+
+    @RasaNLU.app.route("/parse_batch", methods=['POST', 'OPTIONS'])
+    @requires_auth
+    @check_cors
+    @inlineCallbacks
+    def parse_batch(self, request):
+        request.setHeader('Content-Type', 'application/json')
+        request_params = simplejson.loads(
+            request.content.read().decode('utf-8', 'strict'))
+
+        if 'query' in request_params:
+            request_params['q'] = request_params.pop('query')
+
+        if not isinstance(request_params.get('q'), list):
+            request.setResponseCode(404)
+            dumped = json_to_string(
+                {"error": "Invalid parse parameter specified, q must be a list of texts"})
+            returnValue(dumped)
+        else:
+            data = self.data_router.extract(request_params)
+            try:
+                request.setResponseCode(200)
+                response = yield (self.data_router.parse_batch(data, request_params) if self._testing
+                                  else threads.deferToThread(
+                    self.data_router.parse_batch, data, request_params))
+                returnValue(json_to_string(response))
+            except InvalidProjectError as e:
+                request.setResponseCode(404)
+                returnValue(json_to_string({"error": "{}".format(e)}))
+            except Exception as e:
+                request.setResponseCode(500)
+                logger.exception(e)
+                returnValue(json_to_string({"error": "{}".format(e)}))
+
+    @RasaNLU.app.route("/gazette", methods=['POST', 'OPTIONS'])
+    @requires_auth
+    @check_cors
+    @inlineCallbacks
+    def update_gazette(self, request):
+        request.setHeader('Content-Type', 'application/json')
+        request_params = simplejson.loads(
+            request.content.read().decode('utf-8', 'strict'))
+
+        if 'entity' not in request_params:
+            request.setResponseCode(400)
+            returnValue(json_to_string(
+                {"error": "Missing entity parameter"}))
+        else:
+            try:
+                response = yield (self.data_router.update_gazette(request_params) if self._testing
+                                  else threads.deferToThread(
+                    self.data_router.update_gazette, request_params))
+                request.setResponseCode(200)
+                returnValue(json_to_string(response))
+            except InvalidProjectError as e:
+                request.setResponseCode(404)
+                returnValue(json_to_string({"error": "{}".format(e)}))
+            except Exception as e:
+                request.setResponseCode(500)
+                logger.exception(e)
+                returnValue(json_to_string({"error": "{}".format(e)}))
+
+    @RasaNLU.app.route("/synonyms", methods=['POST', 'OPTIONS'])
+    @requires_auth
+    @check_cors
+    @inlineCallbacks
+    def update_synonyms(self, request):
+        request.setHeader('Content-Type', 'application/json')
+        request_params = simplejson.loads(
+            request.content.read().decode('utf-8', 'strict'))
+
+        try:
+            response = yield (self.data_router.update_synonyms(request_params) if self._testing
+                              else threads.deferToThread(
+                self.data_router.update_synonyms, request_params))
+            request.setResponseCode(200)
+            returnValue(json_to_string(response))
+        except InvalidProjectError as e:
+            request.setResponseCode(404)
+            returnValue(json_to_string({"error": "{}".format(e)}))
+        except Exception as e:
+            request.setResponseCode(500)
+            logger.exception(e)
+            returnValue(json_to_string({"error": "{}".format(e)}))
+
 
 logger = logging.getLogger(__name__)
 
 if __name__ == '__main__':
     # Running as standalone python application
-    cmdline_args = create_argument_parser().parse_args()
+    parser = create_argument_parser()
+    parser.add_argument('--micro_batch_size',
+                        type=int,
+                        default=int(os.environ.get('MICRO_BATCH_SIZE', 1)),
+                        help="Maximum number of concurrent parse requests "
+                             "of a model parsed together (1 to disable)")
+    parser.add_argument('--micro_batch_wait',
+                        type=float,
+                        default=float(os.environ.get('MICRO_BATCH_WAIT_MS', 3)),
+                        help="Milliseconds a parse request waits for others "
+                             "to batch with")
+    parser.add_argument('--response_cache_size',
+                        type=int,
+                        default=int(os.environ.get('RESPONSE_CACHE_SIZE', 0)),
+                        help="Number of parse responses cached (0 to disable)")
+    parser.add_argument('--response_cache_ttl',
+                        type=float,
+                        default=float(os.environ.get('RESPONSE_CACHE_TTL', 60)),
+                        help="Seconds a cached parse response is reused")
+    parser.add_argument('--warm_up_texts',
+                        type=int,
+                        default=int(os.environ.get('WARM_UP_TEXTS', 5)),
+                        help="Number of parses warming up a model after it is "
+                             "loaded, before it serves requests (0 to disable)")
+    parser.add_argument('--preload_workers',
+                        type=int,
+                        default=int(os.environ.get('PRELOAD_WORKERS', 4)),
+                        help="Number of projects loaded concurrently at startup")
+    parser.add_argument('--preload_require_all',
+                        action='store_true',
+                        default=bool(os.environ.get('PRELOAD_REQUIRE_ALL')),
+                        help="Only ready once every preloaded project is "
+                             "loaded, a project failing to load keeps the "
+                             "server from being ready")
+    parser.add_argument('--memory_budget_mb',
+                        type=float,
+                        default=float(os.environ.get('MEMORY_BUDGET_MB', 0)),
+                        help="Size of the loaded models above which the least "
+                             "recently used ones are unloaded (0 for no limit)")
+    parser.add_argument('--pinned_models',
+                        nargs='*',
+                        default=os.environ.get('PINNED_MODELS', '').split(),
+                        help="Projects, or project/model, never unloaded "
+                             "to fit the memory budget")
+    cmdline_args = parser.parse_args()
 
     utils.configure_colored_logging(cmdline_args.loglevel)
+    Project.warm_up_texts = cmdline_args.warm_up_texts
     pre_load = cmdline_args.pre_load
 
     _endpoints = read_endpoints(cmdline_args.endpoints)
@@ -75,14 +213,22 @@ if __name__ == '__main__':
             cmdline_args.emulate,
             cmdline_args.storage,
             model_server=_endpoints.model,
-            wait_time_between_pulls=cmdline_args.wait_time_between_pulls
+            wait_time_between_pulls=cmdline_args.wait_time_between_pulls,
+            micro_batch_size=cmdline_args.micro_batch_size,
+            micro_batch_wait=cmdline_args.micro_batch_wait / 1000.0,
+            memory_budget_mb=cmdline_args.memory_budget_mb,
+            pinned_models=cmdline_args.pinned_models,
+            preload_workers=cmdline_args.preload_workers,
+            preload_require_all=cmdline_args.preload_require_all,
+            response_cache_size=cmdline_args.response_cache_size,
+            response_cache_ttl=cmdline_args.response_cache_ttl
     )
 
     if pre_load:
         logger.debug('Preloading....')
         if 'all' in pre_load:
-            pre_load = router.project_store.keys()
-        router._pre_load(pre_load)
+            pre_load = list(router.project_store.keys())
+        router.pre_load_in_background(pre_load)
 
     rasa = BFRasaNLU(
             router,
@@ -0,0 +1,99 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib.parse import parse_qs
+
+# the server runs from nlu/, where the overrides import `overrides` and `components`
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "nlu"))
+
+
+class StubServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """HTTP server standing in for Duckling, Bing or Botfront in tests.
+
+    Records the body of every POST in `requests` (decoded from JSON or from
+    a form) and the address of the clients in `clients`, and answers with
+    `response` as JSON after `delay` seconds, or with an empty body if
+    `response` is None."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, response=None, delay=0, port=0):
+        self.response = response
+        self.delay = delay
+        self.requests = []
+        self.clients = set()
+        BaseHTTPServer.HTTPServer.__init__(self, ("127.0.0.1", port), _StubHandler)
+        self.url = "http://127.0.0.1:{}/".format(self.server_address[1])
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class _StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        if "json" in (self.headers.get("Content-Type") or ""):
+            self.server.requests.append(json.loads(body))
+        else:
+            self.server.requests.append({k: v[0] for k, v in parse_qs(body).items()})
+        self.server.clients.add(self.client_address)
+        time.sleep(self.server.delay)
+
+        response = b"" if self.server.response is None else json.dumps(self.server.response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+class ComponentMetadata(object):
+    """Model metadata giving `meta` to every component."""
+
+    def __init__(self, meta):
+        self.meta = meta
+
+    def for_component(self, name, defaults=None):
+        return self.meta
+
+
+@pytest.fixture
+def stub_server():
+    return StubServer
+
+
+@pytest.fixture
+def unused_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture
+def component_metadata():
+    return ComponentMetadata
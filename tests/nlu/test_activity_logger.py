@@ -0,0 +1,98 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import time
+
+from nlu.components.botfront.activity_logger import ActivityLogger
+from nlu.components.botfront.log_shipper import LogShipper
+from rasa_nlu.training_data.message import Message
+
+
+def _message(text):
+    return Message(text, {"intent": {"name": "greet", "confidence": 0.9}, "entities": []},
+                   output_properties={"intent", "entities"})
+
+
+def test_activity_logger(stub_server):
+    with stub_server() as botfront:
+        logger = ActivityLogger({"url": botfront.url})
+        logger.process(_message("hello"), request_params={"model": "model_id"})
+        logger.process(_message("not logged"), request_params={"model": "model_id", "nolog": "1"})
+        assert logger.shipper.flush(timeout=5)
+
+    assert botfront.requests == [{"text": "hello", "intent": "greet", "confidence": 0.9,
+                               "entities": [], "modelId": "model_id"}]
+    # every model logging to the same url shares the shipper
+    assert ActivityLogger({"url": botfront.url}).shipper is logger.shipper
+
+
+def test_several_records_posted_one_by_one(stub_server):
+    with stub_server() as botfront:
+        logger = ActivityLogger({"url": botfront.url, "flush_interval": 0.2})
+        for text in ["hello", "hi", "hey"]:
+            logger.process(_message(text), request_params={"model": "model_id"})
+        assert logger.shipper.flush(timeout=5)
+
+    assert [request["text"] for request in botfront.requests] == ["hello", "hi", "hey"]
+    assert all(isinstance(request, dict) for request in botfront.requests)
+
+
+def test_batches(stub_server):
+    with stub_server() as botfront, stub_server() as batches:
+        shipper = LogShipper(botfront.url, batch_size=3, flush_interval=0.2, batch_url=batches.url)
+        for i in range(4):
+            shipper.submit({"i": i})
+        assert shipper.flush(timeout=5)
+
+    # batches are always posted as lists, even of one record
+    assert batches.requests == [[{"i": 0}, {"i": 1}, {"i": 2}], [{"i": 3}]]
+    assert botfront.requests == []
+    assert shipper.stats()["sent"] == 4
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_spool(tmpdir, stub_server, unused_port):
+    shipper = LogShipper("http://127.0.0.1:{}/".format(unused_port), batch_size=2, flush_interval=0.1,
+                         max_retries=1, backoff=0.01, spool_dir=tmpdir.strpath, retry_interval=0.5)
+    shipper.submit({"i": 0})
+    shipper.submit({"i": 1})
+    assert shipper.flush(timeout=5)
+    assert shipper.stats()["spooled"] == 2
+    assert shipper.stats()["failures"] == 2
+    assert shipper.stats()["state"] == "open"
+    assert len(os.listdir(tmpdir.strpath)) == 1
+
+    # while the url is down, the records are spooled without being posted
+    shipper.submit({"i": 2})
+    shipper.submit({"i": 3})
+    assert shipper.flush(timeout=0.4)
+    assert shipper.stats()["spooled"] == 4
+    assert shipper.stats()["failures"] == 2
+    assert shipper.stats()["dropped"] == 0
+
+    with stub_server(port=unused_port) as botfront:
+        assert _wait_for(lambda: shipper.stats()["spooled"] == 0)
+        shipper.submit({"i": 4})
+        assert shipper.flush(timeout=5)
+
+    assert botfront.requests == [[{"i": 0}, {"i": 1}], [{"i": 2}, {"i": 3}], [{"i": 4}]]
+    assert shipper.stats()["state"] == "closed"
+    assert os.listdir(tmpdir.strpath) == []
+
+
+def test_dropped(unused_port):
+    shipper = LogShipper("http://127.0.0.1:{}/".format(unused_port), max_queue=1)
+    shipper.stop()
+    assert shipper.submit({"i": 0})
+    assert not shipper.submit({"i": 1})
+    assert shipper.stats()["dropped"] == 1
+    assert shipper.stats()["queued"] == 1
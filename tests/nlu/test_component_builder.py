@@ -0,0 +1,47 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import time
+
+from rasa_nlu import registry
+from rasa_nlu.components import ComponentBuilder
+
+from overrides import component_builder as component_builder_override
+
+
+class _LanguageModel(object):
+    name = "language_model"
+
+    @classmethod
+    def cache_key(cls, model_metadata):
+        return "language_model-en"
+
+
+def test_cache_misses_serialized_per_cache_key(monkeypatch):
+    loads = []
+
+    def load_component_by_name(component_name, model_dir, model_metadata, cached_component, **kwargs):
+        if cached_component is not None:
+            return cached_component
+        time.sleep(0.05)
+        loads.append(component_name)
+        return _LanguageModel()
+
+    monkeypatch.setattr(registry, "get_component_class", lambda name: _LanguageModel)
+    monkeypatch.setattr(registry, "load_component_by_name", load_component_by_name)
+    monkeypatch.setattr(ComponentBuilder, "load_component", component_builder_override.load_component)
+
+    builder = ComponentBuilder()
+    components = []
+    threads = [threading.Thread(target=lambda: components.append(builder.load_component("nlp", "", None)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert loads == ["nlp"]
+    assert len(components) == 4 and all(component is components[0] for component in components)
@@ -0,0 +1,181 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+
+import pytest
+import requests
+
+from nlu.components.botfront import UNCACHEABLE
+from nlu.components.botfront.circuit_breaker import CircuitBreaker
+from nlu.components.botfront.duckling_http_extractor import DucklingHTTPExtractor
+from nlu.components.botfront.lru_cache import LRUCache
+from rasa_nlu.training_data.message import Message
+
+NUMBER_MATCH = {"body": "two", "start": 0, "end": 3, "dim": "number", "latent": False,
+                "value": {"value": 2, "type": "value"}}
+
+TOMORROW_MATCH = {"body": "tomorrow", "start": 0, "end": 8, "dim": "time", "latent": False,
+                  "value": {"values": [], "value": "2019-03-02T00:00:00.000-05:00", "grain": "day", "type": "value"}}
+
+# 2019-03-01T12:00:00-05:00
+NOON = 1551459600000
+HOUR = 3600 * 1000
+
+
+def _process(extractor, text="two people", reference_time=None):
+    message = Message(text)
+    extractor.process(message, request_params={"reference_time": reference_time})
+    return message.get("entities")
+
+
+def test_dimensions_sent_and_session_reused(stub_server):
+    with stub_server([NUMBER_MATCH]) as duckling:
+        extractor = DucklingHTTPExtractor({"url": duckling.url, "dimensions": ["number"]}, "en")
+        for _ in range(3):
+            entities = _process(extractor)
+            assert [(e["entity"], e["value"]) for e in entities] == [("number", 2)]
+
+    assert len(duckling.requests) == 1
+    assert json.loads(duckling.requests[0]["dims"]) == ["number"]
+    assert duckling.requests[0]["locale"] == "en_EN"
+
+    extractor.cache.clear()
+    for _ in range(3):
+        _process(extractor, "three people")
+        _process(extractor, "four people")
+    assert len(duckling.requests) == 3
+    # all the requests went through the same pooled connection
+    assert len(duckling.clients) == 1
+
+
+def test_time_cached_within_grain(stub_server):
+    with stub_server([TOMORROW_MATCH]) as duckling:
+        extractor = DucklingHTTPExtractor({"url": duckling.url, "timezone": "America/New_York"}, "en")
+        # 11:00 pm and 10:00 am are on the same day in New York
+        for reference_time in [NOON, NOON + 11 * HOUR, NOON - 2 * HOUR]:
+            assert _process(extractor, "tomorrow", reference_time)[0]["value"] == TOMORROW_MATCH["value"]["value"]
+        assert len(duckling.requests) == 1
+
+        # midnight in New York
+        _process(extractor, "tomorrow", NOON + 12 * HOUR)
+        assert len(duckling.requests) == 2
+        assert extractor.stats()["cache"]["hits"] == 3
+
+
+def test_cache_ttl():
+    now = [0.0]
+    cache = LRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    now[0] = 5.0
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    now[0] = 12.0
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["expired"] == 1
+
+
+def test_circuit_breaker_fails_fast(unused_port):
+    extractor = DucklingHTTPExtractor({"url": "http://127.0.0.1:{}".format(unused_port), "failure_threshold": 2}, "en")
+    for _ in range(4):
+        assert _process(extractor) == []
+    assert extractor.circuit_breaker.state == CircuitBreaker.OPEN
+    assert extractor.circuit_breaker.failures == 2
+    assert extractor.circuit_breaker.rejected == 2
+
+
+def test_circuit_breaker_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    assert breaker.allow()
+    breaker.failure()
+    assert not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # only one trial call at a time
+    assert not breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+class _BrokenSession(object):
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+def test_failed_trial_call_reopens_circuit():
+    now = [0.0]
+    extractor = DucklingHTTPExtractor({"url": "http://duckling"}, "en")
+    extractor.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    extractor.session = _BrokenSession(requests.exceptions.ChunkedEncodingError("truncated"))
+
+    assert extractor._duckling_request("two people", None, None) is None
+    assert extractor.circuit_breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 10.0
+    assert extractor._duckling_request("two people", None, None) is None
+    assert extractor.circuit_breaker.state == CircuitBreaker.OPEN
+    assert extractor.session.calls == 2
+
+    # the next trial call is let through once the timeout elapsed again
+    now[0] = 20.0
+    extractor.session = _BrokenSession(ValueError("bug"))
+    with pytest.raises(ValueError):
+        extractor._duckling_request("two people", None, None)
+    assert extractor.circuit_breaker.state == CircuitBreaker.OPEN
+
+
+def test_prefetch(stub_server):
+    with stub_server([NUMBER_MATCH]) as duckling:
+        extractor = DucklingHTTPExtractor({"url": duckling.url, "prefetch": True, "cache_size": 0}, "en")
+        message = Message("two people")
+        prefetched = extractor.prefetch(message, request_params={})
+        extractor.process(message, request_params={}, prefetched=prefetched)
+        assert message.get("entities")[0]["value"] == 2
+        assert len(duckling.requests) == 1
+
+        # the text changed since the request started
+        message = Message("two peopel")
+        prefetched = extractor.prefetch(message, request_params={})
+        message.text = "two people"
+        extractor.process(message, request_params={}, prefetched=prefetched)
+        assert message.get("entities")[0]["value"] == 2
+        assert duckling.requests[-1]["text"] == "two people"
+
+        extractor.component_config["prefetch"] = False
+        assert extractor.prefetch(message, request_params={}) is None
+
+
+def test_times_relative_to_now_uncacheable(stub_server):
+    with stub_server([TOMORROW_MATCH]) as duckling:
+        extractor = DucklingHTTPExtractor({"url": duckling.url}, "en")
+        message = Message("tomorrow")
+        extractor.process(message, request_params={})
+        assert message.get(UNCACHEABLE)
+
+        message = Message("tomorrow")
+        extractor.process(message, request_params={"reference_time": NOON})
+        assert not message.get(UNCACHEABLE)
+
+    with stub_server([NUMBER_MATCH]) as duckling:
+        extractor = DucklingHTTPExtractor({"url": duckling.url}, "en")
+        message = Message("two people")
+        extractor.process(message, request_params={})
+        assert not message.get(UNCACHEABLE)
@@ -0,0 +1,113 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+
+import pytest
+
+from nlu.components.botfront import duckling_local
+from nlu.components.botfront.duckling_http_extractor import DucklingHTTPExtractor, convert_duckling_format_to_rasa
+from rasa_nlu.training_data.message import Message
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+# texts and dimensions to compare the in-process parsing with duckling on
+with io.open(os.path.join(DATA_DIR, "duckling_inputs.json"), encoding="utf-8") as f:
+    DUCKLING_INPUTS = json.load(f)
+
+# responses of a duckling server (locale en_US) to the inputs, recorded by
+# running this module with the url of the server
+RESPONSES_FILE = os.path.join(DATA_DIR, "duckling_responses.json")
+
+
+def _duckling_request(url, case):
+    import requests
+
+    response = requests.post(url.rstrip("/") + "/parse", timeout=10, data={
+        "text": case["text"], "locale": "en_US", "dims": json.dumps(case["dims"])})
+    response.raise_for_status()
+    return response.json()
+
+
+def _duckling_response(case):
+    """The response of the duckling server at RASA_DUCKLING_HTTP_URL to the case, or the recorded one.
+
+    The in-process parsing is unverified without either, so a missing recording fails the test."""
+
+    if os.environ.get("RASA_DUCKLING_HTTP_URL"):
+        return _duckling_request(os.environ["RASA_DUCKLING_HTTP_URL"], case)
+    if not os.path.exists(RESPONSES_FILE):
+        pytest.fail("{} is missing, record it by running this module with the url of a duckling server"
+                    "".format(RESPONSES_FILE))
+    with io.open(RESPONSES_FILE, encoding="utf-8") as f:
+        for recorded in json.load(f):
+            if recorded["text"] == case["text"] and recorded["dims"] == case["dims"]:
+                return recorded["response"]
+    pytest.fail("no recorded duckling response to {!r}, record them again".format(case["text"]))
+
+
+def _entities(matches):
+    return sorted(convert_duckling_format_to_rasa(matches), key=lambda e: (e["start"], e["end"], e["entity"]))
+
+
+@pytest.mark.parametrize("case", DUCKLING_INPUTS, ids=[c["text"] for c in DUCKLING_INPUTS])
+def test_conformance(case):
+    response = _duckling_response(case)
+    matches, resolved = duckling_local.parse(case["text"], "en_US", case["dims"])
+
+    # merged with duckling's matches of the other dimensions, as by the extractor
+    remote = [m for m in response if m["dim"] not in resolved]
+    assert _entities(duckling_local.remove_subsumed(matches + remote)) == _entities(response)
+
+
+@pytest.mark.parametrize("text,dims", [
+    ("pay 1,5 euros", ["number", "amount-of-money"]),
+    ("$1,5 please", ["amount-of-money"]),
+    ("the 1,000th visitor", ["ordinal"]),
+    ("version 1.2.3 is out", ["number"]),
+    ("a table for two people", ["number"]),
+    ("something between $10 and $20", ["amount-of-money"]),
+    ("5 bucks", ["amount-of-money"]),
+    ("my email is jane.doe+nlu@example.co.uk", ["url"]),
+])
+def test_partial_matches_left_to_duckling(text, dims):
+    matches, resolved = duckling_local.parse(text, "en_US", dims)
+    assert resolved == set()
+    assert matches == []
+
+
+def test_overlapping_dimensions_kept():
+    matches, resolved = duckling_local.parse("I need 2 tickets for $10.50", "en_US", ["number", "amount-of-money"])
+    assert resolved == {"number", "amount-of-money"}
+    assert [(m["dim"], m["body"]) for m in matches] == [("number", "2"), ("amount-of-money", "$10.50"),
+                                                        ("number", "10.50")]
+
+    matches, _ = duckling_local.parse("1,000 people", "en_US", ["number"])
+    assert [m["body"] for m in matches] == ["1,000"]
+
+
+def test_other_locales():
+    matches, resolved = duckling_local.parse("write to jane@example.com, 2 times", "fr_FR", ["email", "number"])
+    assert resolved == {"email"}
+    assert [m["dim"] for m in matches] == ["email"]
+
+
+def test_extractor_without_duckling():
+    extractor = DucklingHTTPExtractor({"dimensions": ["number", "email"], "local_dimensions": True}, "en")
+    message = Message("2 tickets for jane@example.com")
+    extractor.process(message, request_params={})
+    assert [(e["entity"], e["value"]) for e in message.get("entities")] == [("number", 2),
+                                                                            ("email", "jane@example.com")]
+
+
+if __name__ == "__main__":
+    import sys
+
+    # PYTHONPATH=. python tests/nlu/test_duckling_local.py http://localhost:8000
+    recorded = [dict(case, response=_duckling_request(sys.argv[1], case)) for case in DUCKLING_INPUTS]
+    with io.open(RESPONSES_FILE, "w", encoding="utf-8") as f:
+        f.write(json.dumps(recorded, ensure_ascii=False, indent=2) + "\n")
@@ -0,0 +1,74 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from copy import deepcopy
+
+from nlu.components.botfront.duckling_crf_merger import DucklingCrfMerger
+from nlu.components.botfront.entities_post_processor import EntitiesPostProcessor
+from nlu.components.botfront.sweeper import Sweeper
+from rasa_nlu.training_data.message import Message
+
+
+def _entity(entity, start, end, extractor, value=None, **kwargs):
+    entity = {"entity": entity, "start": start, "end": end, "extractor": extractor,
+              "value": value if value is not None else entity}
+    entity.update(kwargs)
+    return entity
+
+
+ENTITIES = [
+    _entity("guests", 9, 26, "ner_crf", "two adults"),
+    _entity("number", 9, 12, "ner_duckling_http", 2, additional_info={"value": 2}),
+    _entity("number", 17, 20, "ner_duckling_http", 4, additional_info={"value": 4}),
+    _entity("date", 30, 45, "ner_crf", "next friday"),
+    _entity("time", 30, 45, "ner_duckling_http", "2019-03-01", additional_info={"grain": "day"}),
+    _entity("number", 50, 51, "ner_duckling_http", 5, additional_info={"value": 5}),
+    _entity("cuisine", 55, 62, "ner_crf", "chinese"),
+    _entity("email", 70, 80, "ner_duckling_http", "a@b.com", additional_info={}),
+]
+
+MERGE = {"guests": ["number"], "date": ["time"]}
+
+
+def test_same_as_merger_and_sweeper():
+    message = Message("xxx", {"entities": deepcopy(ENTITIES)})
+    DucklingCrfMerger(component_config={"entities": MERGE}).process(message)
+    Sweeper(component_config={"entity_names": ["email"]}).process(message)
+
+    fused = Message("xxx", {"entities": deepcopy(ENTITIES)})
+    EntitiesPostProcessor(component_config={"merge": MERGE, "sweep": ["email"]}).process(fused)
+
+    assert fused.get("entities") == message.get("entities")
+    assert [e["entity"] for e in fused.get("entities")] == ["guests", "date", "number", "cuisine"]
+    assert fused.get("entities")[0]["value"] == 4
+    assert fused.get("entities")[1]["additional_info"] == {"grain": "day"}
+
+
+def test_merge_first_containing_entity():
+    entities = [
+        _entity("date", 10, 20, "ner_crf"),
+        _entity("date", 0, 30, "ner_crf"),
+        _entity("time", 12, 18, "ner_duckling_http", "2019-03-01"),
+    ]
+    message = Message("xxx", {"entities": entities})
+    EntitiesPostProcessor(component_config={"merge": {"date": ["time"]}}).process(message)
+
+    assert [e["value"] for e in message.get("entities")] == ["2019-03-01", "date"]
+
+
+def test_filter_entities_wrt_intent():
+    config = {"intent_entities": {"book": ["guests", "date"]}}
+    message = Message("xxx", {"intent": {"name": "book"}, "entities": deepcopy(ENTITIES)})
+    EntitiesPostProcessor(component_config=config).process(message)
+    assert [e["entity"] for e in message.get("entities")] == ["guests", "date"]
+
+    message = Message("xxx", {"intent": {"name": "greet"}, "entities": deepcopy(ENTITIES)})
+    EntitiesPostProcessor(component_config=config).process(message)
+    assert len(message.get("entities")) == len(ENTITIES)
+
+    entities = deepcopy(ENTITIES) + [_entity("city", 90, 96, "ner_spacy")]
+    message = Message("xxx", {"intent": {"name": "book"}, "entities": entities})
+    EntitiesPostProcessor(component_config=config).process(message)
+    assert [e["entity"] for e in message.get("entities")] == ["guests", "date", "city"]
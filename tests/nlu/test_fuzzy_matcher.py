@@ -28,3 +28,98 @@ def test_partial_ratio():
     fuzzy = process.extract(query, val, limit=3, scorer='partial_ratio')
     assert fuzzy == [('orange tango', 100), ('blue tango', 50), ('brown tango', 50)]
 
+
+
+def _random_gazette(size=500, seed=42):
+    import random
+    rnd = random.Random(seed)
+    alphabet = "abcdefghij klmno"
+    return [''.join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 20))) for _ in range(size)]
+
+
+def test_index_same_results():
+    from nlu.components.botfront.fuzzy_matcher.index import NGramIndex
+    gazette = _random_gazette()
+    index = NGramIndex(gazette)
+    queries = gazette[:30] + ["orange", "abc", "klmno fghij", "a"]
+    for scorer in ['ratio', 'partial_ratio', 'substring_ratio']:
+        for limit in [1, 5, 20]:
+            for query in queries:
+                expected = process.extract(query, gazette, limit=limit, scorer=scorer)
+                assert process.extract(query, gazette, limit=limit, scorer=scorer, index=index) == expected
+
+
+def test_bounded_distance():
+    gazette = _random_gazette(200)
+    for val1 in gazette[:20]:
+        for val2 in gazette:
+            d = process.distance(val1, val2)
+            for bound in [0, 1, 3, 8]:
+                assert process.bounded_distance(val1, val2, bound) == min(d, bound + 1)
+
+
+def test_bounded_extract():
+    from nlu.components.botfront.fuzzy_matcher.index import NGramIndex
+    gazette = _random_gazette(200)
+    index = NGramIndex(gazette)
+    for scorer in ['ratio', 'partial_ratio', 'substring_ratio']:
+        for min_score in [40, 70, 90]:
+            for query in gazette[:20] + ["orange", "klmno fghij"]:
+                expected = [m for m in process.extract(query, gazette, limit=None, scorer=scorer) if m[1] >= min_score]
+                assert process.extract(query, gazette, limit=None, scorer=scorer, min_score=min_score) == expected
+                assert process.extract(query, gazette, limit=5, scorer=scorer, min_score=min_score,
+                                       index=index) == expected[:5]
+
+
+def test_substring_distance():
+    query = "orange"
+    candidates = ['orangoutan', 'orange tango', 'olive martini', 'orangemartinin', 'martininorange']
+    assert [process.substring_distance(query, val) for val in candidates] == [1, 0, 4, 0, 0]
+
+    for val1 in _random_gazette(50):
+        for val2 in _random_gazette(50, seed=1):
+            longer, shorter = sorted([val1, val2], key=len, reverse=True)
+            expected = min(process.distance(shorter, longer[i:j])
+                           for i in range(len(longer) + 1) for j in range(i, len(longer) + 1))
+            assert process.substring_distance(val1, val2) == expected
+            assert expected <= process.partial_distance(val1, val2)
+
+
+def test_substring_ratio():
+    query = "orange"
+    val = ['blue tango', 'orange tango', 'brown tango']
+    fuzzy = process.extract(query, val, limit=3, scorer='substring_ratio')
+    assert fuzzy == [('orange tango', 100), ('blue tango', 50), ('brown tango', 50)]
+
+
+def test_extract_batch():
+    from nlu.components.botfront.fuzzy_matcher.index import NGramIndex
+    gazette = _random_gazette(200)
+    index = NGramIndex(gazette)
+    queries = gazette[:10] + ["orange", "klmno fghij", "orange"]
+    for scorer in ['ratio', 'partial_ratio', 'substring_ratio']:
+        for min_score in [None, 70]:
+            expected = [process.extract(query, gazette, limit=5, scorer=scorer, min_score=min_score)
+                        for query in queries]
+            assert process.extract_batch(queries, gazette, limit=5, scorer=scorer, min_score=min_score) == expected
+            assert process.extract_batch(queries, gazette, limit=5, scorer=scorer, min_score=min_score,
+                                         index=index) == expected
+
+
+def test_updated_index():
+    from nlu.components.botfront.fuzzy_matcher.index import NGramIndex
+    gazette = _random_gazette(300)
+    index = NGramIndex(gazette)
+    removed = [0, 7, 8, 150, 299]
+    added = ["orange", "aaaaaa", "klmno fghij"]
+    choices = [c for i, c in enumerate(gazette) if i not in removed] + added
+
+    updated = index.updated(removed, added)
+    fresh = NGramIndex(choices)
+    assert updated.lengths.tolist() == fresh.lengths.tolist()
+    assert set(updated.postings) == set(fresh.postings)
+    for gram, indices in fresh.postings.items():
+        assert updated.postings[gram].tolist() == indices.tolist()
+    assert updated.multi == fresh.multi
+    # the previous index is left unchanged
+    assert len(index) == 300
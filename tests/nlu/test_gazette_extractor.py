@@ -0,0 +1,50 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from nlu.components.botfront.gazette_extractor import GazetteExtractor
+from rasa_nlu.training_data.message import Message
+
+
+def _get_instance(config=None, gazette=None):
+    if config is None:
+        config = {"entities": [{"name": "city"}, {"name": "type"}]}
+
+    if gazette is None:
+        gazette = {"type": ["chinese", "italian", "restaurant"], "city": ["New York", "York", "Paris"]}
+
+    return GazetteExtractor(component_config=config, gazette=gazette)
+
+
+def _extract(text, **kwargs):
+    message = Message(text)
+    _get_instance(**kwargs).process(message)
+    return message.get("entities")
+
+
+def test_exact_and_fuzzy_mentions():
+    entities = _extract("Looking for a chines restaurant in New York")
+    assert [(e["entity"], e["value"], e["start"], e["end"]) for e in entities] == [
+        ("type", "chinese", 14, 20),
+        ("type", "restaurant", 21, 31),
+        ("city", "New York", 35, 43),
+    ]
+    assert entities[0]["gazette_matches"][0] == {"value": "chinese", "score": 85}
+    assert all(e["extractor"] == GazetteExtractor.name for e in entities)
+
+
+def test_longest_mention_wins():
+    entities = _extract("Flights to New York please", config={"entities": [{"name": "city"}]})
+    assert len(entities) == 1
+    assert entities[0]["value"] == "New York"
+
+
+def test_min_score():
+    entities = _extract("Looking for a chines restaurant", config={"entities": [{"name": "type", "min_score": 90}]})
+    assert [e["value"] for e in entities] == ["restaurant"]
+
+
+def test_max_ngram_size():
+    entities = _extract("Flights to New York please", config={"entities": [{"name": "city"}], "max_ngram_size": 1})
+    assert [e["value"] for e in entities] == ["York"]
@@ -0,0 +1,88 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import time
+
+import pytest
+
+from overrides.micro_batcher import MicroBatcher
+
+
+def _submit_concurrently(batcher, submissions):
+    """Submits each (key, item) from its own thread, returns the result or error of each."""
+    outcomes = [None] * len(submissions)
+
+    def submit(i):
+        try:
+            outcomes[i] = batcher.submit(*submissions[i])
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(submissions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_batch_closes_when_full():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(list(items)) or items, max_batch_size=3, max_wait=5)
+
+    start = time.time()
+    assert sorted(_submit_concurrently(batcher, [("model", i) for i in [1, 2, 3]])) == [1, 2, 3]
+    # the leader did not wait for max_wait
+    assert time.time() - start < 2
+    assert len(batches) == 1 and sorted(batches[0]) == [1, 2, 3]
+
+
+def test_leader_runs_batch_after_max_wait():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=16, max_wait=0.05)
+
+    start = time.time()
+    assert batcher.submit("model", "hello") == "hello"
+    assert 0.04 <= time.time() - start < 1
+    assert batcher.stats()["full_batches"] == 0
+
+
+def test_results_mapped_to_submitters():
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items], max_batch_size=8, max_wait=5)
+    assert _submit_concurrently(batcher, [("model", i) for i in range(8)]) == [i * 2 for i in range(8)]
+
+    # items of other keys are batched separately
+    batcher = MicroBatcher(lambda items: [(len(items), item) for item in items], max_batch_size=2, max_wait=5)
+    outcomes = _submit_concurrently(batcher, [("a", 1), ("b", 2), ("a", 3), ("b", 4)])
+    assert outcomes == [(2, 1), (2, 2), (2, 3), (2, 4)]
+
+
+def test_error_raised_to_every_submitter():
+    def run_batch(items):
+        raise ValueError("model failed")
+
+    batcher = MicroBatcher(run_batch, max_batch_size=3, max_wait=5)
+    outcomes = _submit_concurrently(batcher, [("model", i) for i in [1, 2, 3]])
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+
+    # the failed batch is not reused
+    batcher.run_batch = lambda items: items
+    batcher.max_wait = 0.01
+    assert batcher.submit("model", 4) == 4
+
+
+def test_stats():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=2, max_wait=0.05)
+    assert batcher.stats()["mean_batch_size"] == 0.0
+
+    _submit_concurrently(batcher, [("model", 1), ("model", 2)])
+    batcher.submit("model", 3)
+    stats = batcher.stats()
+    assert stats["batches"] == 2
+    assert stats["requests"] == 3
+    assert stats["full_batches"] == 1
+    assert stats["largest_batch"] == 2
+    assert stats["mean_batch_size"] == pytest.approx(1.5)
+    assert stats["max_wait_ms"] == pytest.approx(50)
@@ -0,0 +1,105 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+
+import pytest
+
+from rasa_nlu import config
+from rasa_nlu.model import Trainer
+from rasa_nlu.training_data import Message
+from rasa_nlu.training_data import TrainingData
+
+from overrides import monkey_patch
+
+monkey_patch()
+
+# empty and duplicate texts included
+TEXTS = ["hello there", "", "book a table for two", "hello there", "bye", "something else entirely"]
+
+EXAMPLES = [Message(text, {"intent": intent}) for text, intent in [
+    ("hello", "greet"),
+    ("hello there", "greet"),
+    ("hi", "greet"),
+    ("book a table", "book"),
+    ("book a table for two", "book"),
+    ("I want to book a table", "book"),
+    ("bye", "goodbye"),
+    ("see you", "goodbye"),
+    ("goodbye then", "goodbye"),
+]]
+
+PIPELINES = [
+    # no component with `process_batch`
+    pytest.param([{"name": "tokenizer_whitespace"}, {"name": "intent_classifier_keyword"}], [], id="keyword"),
+    pytest.param([{"name": "nlp_spacy"}, {"name": "tokenizer_spacy"}, {"name": "intent_featurizer_spacy"},
+                  {"name": "intent_classifier_sklearn"}], ["spacy", "sklearn"], id="spacy_sklearn"),
+    pytest.param([{"name": "tokenizer_whitespace"}, {"name": "intent_featurizer_count_vectors"},
+                  {"name": "intent_classifier_sklearn"}], ["sklearn"], id="count_vectors_sklearn"),
+    pytest.param([{"name": "tokenizer_whitespace"}, {"name": "intent_featurizer_count_vectors"},
+                  {"name": "intent_classifier_tensorflow_embedding", "epochs": 2}], ["sklearn", "tensorflow"],
+                 id="embedding"),
+]
+
+
+def _train(pipeline, requires):
+    for module in requires:
+        pytest.importorskip(module)
+    trainer = Trainer(config.RasaNLUModelConfig({"language": "en", "pipeline": pipeline}))
+    return trainer.train(TrainingData(training_examples=EXAMPLES))
+
+
+def _rounded(response):
+    """The response with its floats rounded, as batched matrix operations can differ in the last digits."""
+    return json.loads(json.dumps(response, default=float), parse_float=lambda f: round(float(f), 6))
+
+
+@pytest.mark.parametrize("pipeline,requires", PIPELINES)
+def test_parse_batch_same_as_parse(pipeline, requires):
+    interpreter = _train(pipeline, requires)
+    expected = [_rounded(interpreter.parse(text)) for text in TEXTS]
+
+    assert [_rounded(response) for response in interpreter.parse_batch(TEXTS)] == expected
+    assert interpreter.parse_batch([]) == []
+
+
+def _router(tmpdir):
+    pytest.importorskip("twisted")
+    from overrides.data_router import BFDataRouter
+
+    # without trained projects, the default project parses with its fallback model
+    return BFDataRouter(tmpdir.strpath)
+
+
+def test_router_parse_batch_same_as_parse(tmpdir):
+    router = _router(tmpdir)
+    expected = [router.parse(router.extract({"q": text})) for text in TEXTS]
+
+    assert router.parse_batch(router.extract({"q": TEXTS})) == expected
+    # a single text is parsed as a batch of one
+    assert router.parse_batch(router.extract({"q": TEXTS[0]})) == expected[:1]
+
+
+def test_parse_batch_route(tmpdir):
+    pytest_twisted = pytest.importorskip("pytest_twisted")
+    testing = pytest.importorskip("treq.testing")
+    import server
+
+    router = _router(tmpdir)
+    app = testing.StubTreq(server.BFRasaNLU(router, testing=True).app.resource())
+
+    @pytest_twisted.inlineCallbacks
+    def post(body):
+        response = yield app.post("http://dummy/parse_batch", data=json.dumps(body))
+        content = yield response.json()
+        return response.code, content
+
+    code, content = pytest_twisted.blockon(post({"q": TEXTS}))
+    assert code == 200
+    assert content == [router.parse(router.extract({"q": text})) for text in TEXTS]
+
+    code, content = pytest_twisted.blockon(post({"q": TEXTS[0]}))
+    assert code == 404
+    assert "q must be a list" in content["error"]
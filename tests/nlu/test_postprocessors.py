@@ -3,8 +3,14 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import os
+import threading
+
+import pytest
+
 from nlu.components.botfront.fuzzy_gazette import FuzzyGazette
 from rasa_nlu.training_data.message import Message
+from rasa_nlu.training_data import TrainingData
 
 from pytest import raises
 
@@ -101,4 +107,116 @@ def test_mode_specification():
     _assert_missing_entities(example.data["entities"])
 
     example = _get_example(config={"entities": [{"name": "type", "mode": "partial_ratio"}]}, gazette={"type": ["chinese and a whole bunch of other stuff"]})
-    _test_entity(example.data["entities"][0], "chinese and a whole bunch of other stuff", 1)
\ No newline at end of file
+    _test_entity(example.data["entities"][0], "chinese and a whole bunch of other stuff", 1)
+
+    example = _get_example(config={"entities": [{"name": "type", "mode": "substring_ratio"}]}, gazette={"type": ["chinese and a whole bunch of other stuff"]})
+    _test_entity(example.data["entities"][0], "chinese and a whole bunch of other stuff", 1)
+
+def test_persist_and_load(tmpdir, component_metadata):
+    instance = _get_instance()
+    meta = instance.component_config.copy()
+    meta.update(instance.persist(tmpdir.strpath))
+
+    loaded = FuzzyGazette.load(tmpdir.strpath, component_metadata(meta))
+    assert loaded.gazette == instance.gazette
+    assert set(loaded.index.keys()) == {"type", "city"}
+
+    message = Message(text="Looking for a chines restaurant", data={
+        "entities": [{"entity": "type", "value": "chines", "start": 14, "end": 20, "extractor": "ner_crf"}]
+    })
+    loaded.process(message)
+    _test_entity(message.data["entities"][0], "chinese", 3)
+
+
+def test_bounded_mode():
+    example = _get_example(config={"entities": [{"name": "type", "bounded": True}]})
+    _test_entity(example.data["entities"][0], "chinese", 1)
+
+    example = _get_example(config={"entities": [{"name": "type", "mode": "partial_ratio", "bounded": True}]},
+                           gazette={"type": ["chinese and a whole bunch of other stuff"]})
+    _test_entity(example.data["entities"][0], "chinese and a whole bunch of other stuff", 1)
+
+
+def test_binary_gazette(tmpdir, component_metadata):
+    instance = _get_instance(config={"entities": [{"name": "type"}], "gazette_format": "binary"})
+    meta = instance.component_config.copy()
+    meta.update(instance.persist(tmpdir.strpath))
+    assert meta["gazette_file"] == "fuzzy_gazette.bin"
+
+    loaded = FuzzyGazette.load(tmpdir.strpath, component_metadata(meta))
+    assert {name: list(values) for name, values in loaded.gazette.items()} == instance.gazette
+    assert loaded.gazette["type"][-1] == "something totally different"
+
+    message = Message(text="Looking for a chines restaurant", data={
+        "entities": [{"entity": "type", "value": "chines", "start": 14, "end": 20, "extractor": "ner_crf"}]
+    })
+    loaded.process(message)
+    _test_entity(message.data["entities"][0], "chinese", 3)
+
+
+def test_cache():
+    instance = _get_instance()
+    for _ in range(3):
+        message = Message(text="Looking for a chines restaurant", data={
+            "entities": [{"entity": "type", "value": "chines", "start": 14, "end": 20, "extractor": "ner_crf"}]
+        })
+        instance.process(message)
+        _test_entity(message.data["entities"][0], "chinese", 3)
+
+    assert instance.cache.misses == 1
+    assert instance.cache.hits == 2
+
+    training_data = TrainingData()
+    training_data.fuzzy_gazette = [{"value": "type", "gazette": ["thai"]}]
+    instance.train(training_data, None)
+    assert len(instance.cache) == 0
+
+
+def test_update_gazette(tmpdir, component_metadata):
+    instance = _get_instance(config={"entities": [{"name": "type"}, {"name": "city"}]})
+
+    def process(value):
+        message = Message(text="", data={
+            "entities": [{"entity": "type", "value": value, "start": 0, "end": len(value), "extractor": "ner_crf"}]
+        })
+        instance.process(message)
+        return message.data["entities"]
+
+    assert process("thai") == []
+    assert instance.update_gazette("type", add=["thai", "chinese"], remove=["restaurant"]) == 3
+    assert instance.gazette["type"] == ["chinese", "something totally different", "thai"]
+    assert instance.gazette["city"] == ["New York"]
+    assert process("thai")[0]["value"] == "thai"
+
+    fresh = _get_instance(gazette=instance.gazette)
+    assert instance.index["type"].postings.keys() == fresh.index["type"].postings.keys()
+
+    assert instance.update_gazette("country", add=["Canada"]) == 1
+    meta = instance.component_config.copy()
+    meta.update(instance.persist(tmpdir.strpath))
+    loaded = FuzzyGazette.load(tmpdir.strpath, component_metadata(meta))
+    assert loaded.gazette == instance.gazette
+
+
+@pytest.mark.parametrize("gazette_format", ["json", "binary"])
+def test_concurrent_updates_persisted_consistently(tmpdir, component_metadata, gazette_format):
+    instance = _get_instance(config={"entities": [{"name": "type"}], "gazette_format": gazette_format})
+
+    def update(i):
+        instance.update_gazette("type", add=["cuisine {}".format(i)])
+        instance.persist(tmpdir.strpath)
+
+    threads = [threading.Thread(target=update, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    meta = instance.component_config.copy()
+    meta.update(instance.persist(tmpdir.strpath))
+    loaded = FuzzyGazette.load(tmpdir.strpath, component_metadata(meta))
+    assert list(loaded.gazette["type"]) == list(instance.gazette["type"])
+    # the index is of the same version of the gazette
+    fresh = _get_instance(gazette={"type": list(loaded.gazette["type"])})
+    assert loaded.index["type"].postings.keys() == fresh.index["type"].postings.keys()
+    assert not [f for f in os.listdir(tmpdir.strpath) if f.endswith(".tmp")]
@@ -0,0 +1,93 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import pytest
+
+from overrides.preload import PreloadProgress
+
+
+def test_ready_once_all_loaded():
+    progress = PreloadProgress()
+    progress.start(["a", "b"])
+    assert not progress.is_ready()
+
+    progress.project_loaded("a", 1.5)
+    stats = progress.stats()
+    assert not stats["ready"]
+    assert (stats["total"], stats["loaded"], stats["seconds"]) == (2, 1, {"a": 1.5})
+
+    progress.project_loaded("b", 2.0)
+    stats = progress.stats()
+    assert stats["ready"]
+    assert stats["failed"] == {}
+    assert progress.finished is not None
+
+
+def test_ready_without_projects():
+    assert PreloadProgress().is_ready()
+    assert PreloadProgress(require_all=True).is_ready()
+
+
+@pytest.mark.parametrize("require_all", [False, True])
+def test_failed_project(require_all):
+    progress = PreloadProgress(require_all)
+    progress.start(["a", "b"])
+    progress.project_failed("a", IOError("no metadata"))
+    assert not progress.is_ready()
+
+    progress.project_loaded("b", 1.0)
+    stats = progress.stats()
+    # the failure is reported either way, it only keeps the server from being ready with `require_all`
+    assert stats["ready"] is not require_all
+    assert stats["failed"] == {"a": "no metadata"}
+    assert stats["loaded"] == 1
+    assert progress.finished is not None
+
+
+def _router(tmpdir, **kwargs):
+    pytest.importorskip("twisted")
+    from overrides.data_router import BFDataRouter
+
+    # "untrained" loads its fallback model, the model of "broken" has no metadata
+    tmpdir.mkdir("untrained")
+    tmpdir.mkdir("broken").mkdir("model_20190301-120000")
+    return BFDataRouter(tmpdir.strpath, **kwargs)
+
+
+@pytest.mark.parametrize("require_all", [False, True])
+def test_router_pre_load_in_background(tmpdir, require_all):
+    router = _router(tmpdir, preload_require_all=require_all)
+    router.pre_load_in_background(["untrained", "broken"]).join(10)
+
+    stats = router.get_status()["preload"]
+    assert stats["ready"] is not require_all
+    assert list(stats["seconds"]) == ["untrained"]
+    assert list(stats["failed"]) == ["broken"]
+
+
+def test_ready_route(tmpdir):
+    pytest_twisted = pytest.importorskip("pytest_twisted")
+    testing = pytest.importorskip("treq.testing")
+    import server
+
+    router = _router(tmpdir)
+    app = testing.StubTreq(server.BFRasaNLU(router, testing=True).app.resource())
+
+    @pytest_twisted.inlineCallbacks
+    def get_ready():
+        response = yield app.get("http://dummy/ready")
+        content = yield response.json()
+        return response.code, content
+
+    # in progress
+    router.preload.start(["untrained", "broken"])
+    code, content = pytest_twisted.blockon(get_ready())
+    assert code == 503
+    assert (content["total"], content["loaded"]) == (2, 0)
+
+    router.pre_load_in_background(["untrained", "broken"]).join(10)
+    code, content = pytest_twisted.blockon(get_ready())
+    assert code == 200
+    assert list(content["failed"]) == ["broken"]
@@ -3,9 +3,17 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from rasa_nlu.preprocessors.spell_check import BingSpellCheck
+import time
+
+from nlu.components.botfront.spell_check import BingSpellCheck
 from rasa_nlu.training_data.message import Message
 
+TST_RESPONSE = {
+    "_type": "SpellCheck",
+    "flaggedTokens": [{"offset": 10, "token": "tst", "type": "UnknownToken",
+                       "suggestions": [{"suggestion": "test", "score": 0.95}]}]
+}
+
 
 def _get_instance(config=None):
     return BingSpellCheck(config)
@@ -126,3 +134,112 @@ def test_multiple_errors():
 
     text = instance._replace(message.text, tokens)
     assert text == 'This is a test message'
+
+
+def test_spell_check_server(stub_server):
+    with stub_server(TST_RESPONSE) as server:
+        instance = _get_instance({'url': server.url})
+        for _ in range(3):
+            message = Message(text='This is a tst message')
+            instance.process(message)
+            assert message.text == 'This is a test message'
+
+    assert len(server.requests) == 1
+    stats = instance.stats()
+    assert stats['cache']['hits'] == 2
+    assert stats['latency']['count'] == 1
+
+
+def test_deadline(stub_server):
+    with stub_server(TST_RESPONSE, delay=0.2) as server:
+        instance = _get_instance({'url': server.url, 'deadline': 0.05})
+        message = Message(text='This is a tst message')
+        instance.process(message)
+        assert message.text == 'This is a tst message'
+        assert instance.timeouts == 1
+
+        # the late response is cached for the next message
+        time.sleep(0.4)
+        message = Message(text='This is a tst message')
+        instance.process(message)
+        assert message.text == 'This is a test message'
+        assert len(server.requests) == 1
+
+
+def test_requests_in_flight_bounded(stub_server):
+    with stub_server(TST_RESPONSE, delay=0.3) as server:
+        instance = _get_instance({'url': server.url, 'deadline': 0.05, 'pool_size': 1})
+        for text in ['This is a tst message', 'This is another tst message']:
+            message = Message(text=text)
+            instance.process(message)
+            assert message.text == text
+
+        # the first request is still in flight, the second was not sent
+        assert instance.timeouts == 1
+        assert instance.skipped == 1
+        time.sleep(0.4)
+        assert len(server.requests) == 1
+
+
+def test_spell_check_circuit_breaker(unused_port):
+    instance = _get_instance({'url': 'http://127.0.0.1:{}/'.format(unused_port), 'failure_threshold': 1})
+    for _ in range(3):
+        message = Message(text='This is a tst message')
+        instance.process(message)
+        assert message.text == 'This is a tst message'
+
+    stats = instance.stats()
+    assert stats['circuit_breaker']['state'] == 'open'
+    assert stats['circuit_breaker']['rejected'] == 2
+    assert stats['latency']['count'] == 1
+
+
+def _symspell_instance(config=None):
+    from nlu.components.botfront.spell_check import SymSpellCheck
+    from rasa_nlu.training_data import TrainingData
+
+    training_data = TrainingData([Message("This is a test message"), Message("I want a chinese restaurant")],
+                                 lookup_tables=[{"name": "city", "elements": ["Montreal", "New York"]}])
+    training_data.fuzzy_gazette = [{"value": "cuisine", "gazette": ["mexican", "italian"]}]
+    instance = SymSpellCheck(config)
+    instance.train(training_data, None)
+    return instance
+
+
+def test_symspell():
+    instance = _symspell_instance()
+    message = Message(text='Ths is a tst mesage about italain food in Montral')
+    instance.process(message)
+    assert message.text == 'This is a test message about italian food in Montreal'
+
+    flagged_tokens = instance._flagged_tokens('a tst')
+    assert flagged_tokens[0]['offset'] == 2 and flagged_tokens[0]['token'] == 'tst'
+    assert flagged_tokens[0]['suggestions'][0]['suggestion'] == 'test'
+
+
+def test_symspell_persist_and_load(tmpdir, component_metadata):
+    from nlu.components.botfront.spell_check import SymSpellCheck
+
+    instance = _symspell_instance()
+    meta = instance.component_config.copy()
+    meta.update(instance.persist(tmpdir.strpath))
+
+    loaded = SymSpellCheck.load(tmpdir.strpath, component_metadata(meta))
+    message = Message(text='NEW YOK')
+    loaded.process(message)
+    assert message.text == 'NEW YORK'
+
+
+def test_symspell_lookup():
+    from nlu.components.botfront.symspell import SymSpell
+    import random
+    import editdistance
+
+    rnd = random.Random(0)
+    words = [''.join(rnd.choice('abcdef') for _ in range(rnd.randint(1, 10))) for _ in range(300)]
+    dictionary = SymSpell(max_distance=2, prefix_length=5)
+    dictionary.add(words)
+    for token in ['abcabc', 'fedcbafe', 'aaaaaaaaaa', 'bb', 'cafebabe', 'fffffff']:
+        assert token not in words
+        expected = {w for w in words if editdistance.eval(token, w) <= 2}
+        assert {w for w, _, _ in dictionary.lookup(token)} == expected
@@ -0,0 +1,113 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from rasa_nlu.project import Project
+
+from overrides import project as project_override
+
+OLD_MODEL = "model_20190301-120000"
+NEW_MODEL = "model_20190302-120000"
+NEWEST_MODEL = "model_20190303-120000"
+
+
+class _Interpreter(object):
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def parse(self, text, time=None, request_params=None):
+        return {"text": text, "interpreter": self}
+
+
+class _Project(Project):
+    """Project with the overrides of `Project`, listing `model_names` and loading fake interpreters."""
+
+    _loaded_generation = 0
+    warm_up_texts = 0
+    _load_interpreter = project_override._load_interpreter
+    _invalidate_loaded = project_override._invalidate_loaded
+    _notify_models_changed = project_override._notify_models_changed
+    on_models_changed = None
+    _search_for_models = project_override.search_for_models
+    parse = project_override.parse
+    update = project_override.invalidating_loaded(Project.update)
+    unload = project_override.invalidating_loaded(Project.unload)
+
+    def __init__(self, model_names):
+        self.model_names = list(model_names)
+        self.loads = []
+        self._loaded = {}
+        super(_Project, self).__init__(project="default")
+
+    def _list_models_in_dir(self, path):
+        return list(self.model_names)
+
+    def _interpreter_for_model(self, model_name, model_dir=None):
+        self.loads.append(model_name)
+        return _Interpreter(model_name)
+
+
+def _parse(project, model=None):
+    response = project.parse("hello", requested_model_name=model)
+    assert response["interpreter"].model_name == response["model"]
+    return response
+
+
+def test_loaded_model_parsed_without_loading():
+    project = _Project([OLD_MODEL])
+    first = _parse(project)
+    assert first["model"] == OLD_MODEL
+    assert project._loaded[None] == (OLD_MODEL, first["interpreter"])
+
+    assert _parse(project)["interpreter"] is first["interpreter"]
+    assert _parse(project, OLD_MODEL)["interpreter"] is first["interpreter"]
+    assert project.loads == [OLD_MODEL]
+
+
+def test_latest_model_after_update():
+    project = _Project([OLD_MODEL])
+    assert _parse(project)["model"] == OLD_MODEL
+
+    # a model trained by the server is added with `update`
+    project.update(NEW_MODEL)
+    assert project._loaded == {}
+    assert _parse(project)["model"] == NEW_MODEL
+
+
+def test_model_reloaded_after_unload():
+    project = _Project([OLD_MODEL])
+    interpreter = _parse(project, OLD_MODEL)["interpreter"]
+
+    project.unload(OLD_MODEL)
+    assert project._loaded == {}
+    reloaded = _parse(project, OLD_MODEL)["interpreter"]
+    assert reloaded is not interpreter
+    assert project.loads == [OLD_MODEL, OLD_MODEL]
+
+
+def test_latest_model_after_model_list_changed():
+    project = _Project([OLD_MODEL])
+    assert _parse(project)["model"] == OLD_MODEL
+
+    # a model persisted by another process is found when it is requested
+    project.model_names.append(NEW_MODEL)
+    assert _parse(project, NEW_MODEL)["model"] == NEW_MODEL
+    assert _parse(project)["model"] == NEW_MODEL
+
+    # or when an unknown model is requested
+    project.model_names.append(NEWEST_MODEL)
+    assert _parse(project, "model_unknown")["model"] == NEWEST_MODEL
+    assert _parse(project)["model"] == NEWEST_MODEL
+
+
+def test_unknown_model_not_published():
+    project = _Project([OLD_MODEL])
+    assert _parse(project, "model_unknown")["model"] == OLD_MODEL
+    assert "model_unknown" not in project._loaded
+
+    # requests for it keep resolving to the latest model
+    project.update(NEW_MODEL)
+    assert _parse(project, "model_unknown")["model"] == NEW_MODEL
+    assert "model_unknown" not in project._loaded
@@ -0,0 +1,106 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import time
+
+from rasa_nlu.project import FALLBACK_MODEL_NAME
+from rasa_nlu.project import Project
+
+from overrides.residency import ModelResidency
+
+MB = 1024 * 1024
+
+
+class _Metadata(object):
+
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+
+
+class _Interpreter(object):
+
+    def __init__(self, model_dir):
+        self.model_metadata = _Metadata(model_dir)
+
+
+class _Project(object):
+
+    def __init__(self, pull_models=None):
+        self._models = {}
+        self.pull_models = pull_models
+
+    def unload(self, model_name):
+        self._models[model_name] = None
+
+
+def _load(tmpdir, project, model, size_mb):
+    model_dir = tmpdir.mkdir(model).strpath
+    with open(os.path.join(model_dir, "model.bin"), "wb") as f:
+        f.write(b"\0" * int(size_mb * MB))
+    project._models[model] = _Interpreter(model_dir)
+
+
+def test_least_recently_used_unloaded(tmpdir):
+    project = _Project()
+    residency = ModelResidency(budget_mb=2.5)
+    _load(tmpdir, project, "a", 1)
+    _load(tmpdir, project, "b", 1)
+    residency.enforce({"default": project})
+    assert residency.used() == 2 * MB
+
+    time.sleep(0.01)
+    residency.touch("default", "a")
+    _load(tmpdir, project, "c", 1)
+    residency.enforce({"default": project})
+    assert project._models["b"] is None
+    assert project._models["a"] is not None and project._models["c"] is not None
+    assert residency.used() == 2 * MB
+    assert residency.evictions == 1
+
+
+def test_pulled_models_never_unloaded(tmpdir):
+    pinned, pulled, local = _Project(), _Project(pull_models=True), _Project()
+    residency = ModelResidency(budget_mb=0.5, pinned=["pinned"])
+    _load(tmpdir.mkdir("pinned"), pinned, "model", 1)
+    _load(tmpdir.mkdir("pulled"), pulled, "model", 1)
+    _load(tmpdir.mkdir("local"), local, "model", 1)
+    _load(tmpdir.mkdir("local_latest"), local, "latest", 1)
+
+    residency.enforce({"pinned": pinned, "pulled": pulled, "local": local})
+    assert pinned._models["model"] is not None
+    assert pulled._models["model"] is not None
+    # the least recently used unpinned model is unloaded, the last one is kept
+    assert [model for model, interpreter in local._models.items() if interpreter is not None] == ["latest"]
+
+
+def test_enforced_when_models_changed(tmpdir):
+    project = _Project()
+    residency = ModelResidency()
+    assert residency.changed
+    residency.enforce({"default": project})
+    assert not residency.changed
+
+    _load(tmpdir, project, "a", 1)
+    residency.models_changed()
+    assert residency.changed
+    residency.enforce({"default": project})
+    assert residency.used() == MB
+
+
+def test_fallback_model_never_unloaded(tmpdir):
+    untrained, trained = Project(project="untrained"), _Project()
+    assert list(untrained._models) == [FALLBACK_MODEL_NAME]
+    residency = ModelResidency(budget_mb=0.5)
+    residency.enforce({"untrained": untrained})
+
+    # the fallback model is the least recently used one
+    time.sleep(0.01)
+    _load(tmpdir, trained, "a", 1)
+    _load(tmpdir, trained, "b", 1)
+    residency.enforce({"untrained": untrained, "trained": trained})
+    assert untrained._models[FALLBACK_MODEL_NAME] is not None
+    assert trained._models["a"] is None
+    assert untrained.parse("hello")["model"] == FALLBACK_MODEL_NAME
@@ -0,0 +1,168 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import time
+
+import pytest
+
+from overrides.response_cache import ResponseCache, UNCACHEABLE
+
+
+class _Parser(object):
+    """Counts the parses, which wait for `release` when it is given."""
+
+    def __init__(self, response=None, error=None, release=None):
+        self.response = response or {"text": "hello", "intent": {"name": "greet"}}
+        self.error = error
+        self.release = release
+        self.started = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return dict(self.response)
+
+
+def _get_concurrently(cache, key, parse, count, reused=None):
+    """Gets `key` from `count` threads once the first one runs `parse`,
+    returns the response or error of each."""
+    outcomes = [None] * count
+
+    def get(i):
+        try:
+            outcomes[i] = cache.get_or_parse(key, parse, reused)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=get, args=(i,)) for i in range(count)]
+    threads[0].start()
+    assert parse.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # the followers are waiting for the leader
+    deadline = time.time() + 5
+    while cache.coalesced < count - 1 and time.time() < deadline:
+        time.sleep(0.01)
+    parse.release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_cached_response_copied():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    parse = _Parser()
+    reused = []
+    first = cache.get_or_parse("key", parse, reused.append)
+    first["intent"]["name"] = "changed"
+
+    second = cache.get_or_parse("key", parse, reused.append)
+    assert second == {"text": "hello", "intent": {"name": "greet"}}
+    assert parse.calls == 1
+    # only the response not parsed for the call is reused
+    assert reused == [second]
+
+
+def test_concurrent_requests_coalesced():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    parse = _Parser(release=threading.Event())
+    reused = []
+    outcomes = _get_concurrently(cache, "key", parse, 4, reused.append)
+
+    assert parse.calls == 1
+    assert all(outcome == parse.response for outcome in outcomes)
+    assert cache.stats()["coalesced"] == 3
+    assert len(reused) == 3
+
+
+def test_leader_error_raised_to_followers():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    parse = _Parser(error=ValueError("pipeline failed"), release=threading.Event())
+    outcomes = _get_concurrently(cache, "key", parse, 3)
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+
+    # the error is not cached
+    parse.error = None
+    assert cache.get_or_parse("key", parse) == parse.response
+    assert parse.calls == 2
+
+
+def test_ttl():
+    now = [0.0]
+    cache = ResponseCache(maxsize=10, ttl=60, clock=lambda: now[0])
+    parse = _Parser()
+    cache.get_or_parse("key", parse)
+    now[0] = 59.0
+    cache.get_or_parse("key", parse)
+    assert parse.calls == 1
+
+    now[0] = 61.0
+    cache.get_or_parse("key", parse)
+    assert parse.calls == 2
+
+
+def test_uncacheable_not_stored():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    parse = _Parser(response={"text": "tomorrow", UNCACHEABLE: True})
+    for _ in range(2):
+        assert cache.get_or_parse("key", parse) == {"text": "tomorrow"}
+    assert parse.calls == 2
+    assert cache.stats()["uncacheable"] == 2
+
+
+def test_generation_invalidates():
+    # the router keys responses with the generation of the project, bumped when its models change
+    cache = ResponseCache(maxsize=10, ttl=60)
+    parse = _Parser()
+    generation = 0
+    cache.get_or_parse(("default", None, generation, "hello"), parse)
+    cache.get_or_parse(("default", None, generation, "hello"), parse)
+    assert parse.calls == 1
+
+    generation += 1
+    cache.get_or_parse(("default", None, generation, "hello"), parse)
+    assert parse.calls == 2
+
+    cache.clear()
+    cache.get_or_parse(("default", None, generation, "hello"), parse)
+    assert parse.calls == 3
+
+
+@pytest.mark.parametrize("nolog", [False, True])
+def test_activity_logged_on_cache_hits(stub_server, nolog):
+    from rasa_nlu.model import Interpreter
+    from nlu.components.botfront.activity_logger import ActivityLogger
+    from overrides.model import replay_side_effects
+
+    with stub_server() as botfront:
+        logger = ActivityLogger({"url": botfront.url, "flush_interval": 0.05})
+        interpreter = Interpreter([logger], context={})
+        response = {"text": "hello", "intent": {"name": "greet", "confidence": 0.9}, "entities": [],
+                    "project": "default", "model": "model_id"}
+        params = {"model": "model_id"}
+        if nolog:
+            params["nolog"] = "true"
+        replay_side_effects(interpreter, response, request_params=params)
+        assert logger.shipper.flush(timeout=5)
+
+    expected = [] if nolog else [{"text": "hello", "intent": "greet", "confidence": 0.9, "entities": [],
+                                  "modelId": "model_id"}]
+    assert botfront.requests == expected
+
+
+def test_rasa_duckling_not_cacheable():
+    from rasa_nlu.extractors.duckling_http_extractor import DucklingHTTPExtractor
+
+    from overrides import monkey_patch
+
+    monkey_patch()
+    # its times are relative to now
+    assert DucklingHTTPExtractor.cacheable is False
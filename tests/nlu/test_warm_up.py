@@ -0,0 +1,94 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+
+import pytest
+
+from rasa_nlu import config
+from rasa_nlu.model import Interpreter
+from rasa_nlu.model import Metadata
+from rasa_nlu.model import Trainer
+from rasa_nlu.project import Project
+from rasa_nlu.training_data import Message
+from rasa_nlu.training_data import TrainingData
+
+from overrides import model as model_override
+from overrides import monkey_patch
+from overrides import project as project_override
+
+monkey_patch()
+
+
+class _Component(object):
+    """Records the texts it processes, raises `error` if given."""
+
+    def __init__(self, network_bound=False, error=None):
+        self.network_bound = network_bound
+        self.error = error
+        self.texts = []
+
+    def process(self, message, **kwargs):
+        self.texts.append(message.text)
+        if self.error is not None:
+            raise self.error
+
+
+def _interpreter(*pipeline):
+    return Interpreter(list(pipeline), {}, Metadata({}, None))
+
+
+def test_network_bound_components_skipped():
+    local, remote = _Component(), _Component(network_bound=True)
+    seconds = _interpreter(local, remote).warm_up(["hello", "bye"])
+
+    assert local.texts == ["hello", "bye"]
+    assert remote.texts == []
+    assert seconds >= 0
+
+
+def test_synthetic_texts_without_training_examples(tmpdir):
+    assert model_override.warm_up_texts(Metadata({}, None), 3) == model_override.SYNTHETIC_TEXTS[:3]
+
+    with io.open(os.path.join(tmpdir.strpath, "training_data.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps({"rasa_nlu_data": {"common_examples": [{"text": "hi", "intent": "greet"}]}}))
+    metadata = Metadata({"training_data": "training_data.json"}, tmpdir.strpath)
+    # completed with synthetic texts, cycled when more are needed
+    texts = model_override.warm_up_texts(metadata, len(model_override.SYNTHETIC_TEXTS) + 2)
+    assert texts == ["hi"] + model_override.SYNTHETIC_TEXTS + model_override.SYNTHETIC_TEXTS[:1]
+
+
+def test_failing_warm_up_does_not_block_loading(monkeypatch):
+    failing = _Component(error=ValueError("not ready"))
+    interpreter = _interpreter(failing)
+    monkeypatch.setattr(project_override, "_rasa_interpreter_for_model",
+                        lambda project, model_name, model_dir=None: interpreter)
+    project = Project(project="default")
+    project.warm_up_texts = 3
+
+    assert project._interpreter_for_model("model_20190301-120000") is interpreter
+    assert failing.texts == model_override.SYNTHETIC_TEXTS[:1]
+    assert interpreter.warm_up_seconds >= 0
+
+
+def test_warm_up_seconds_in_status(tmpdir, monkeypatch):
+    pytest.importorskip("twisted")
+    from overrides.data_router import BFDataRouter
+
+    trainer = Trainer(config.RasaNLUModelConfig({"language": "en", "pipeline": [
+        {"name": "tokenizer_whitespace"}, {"name": "intent_classifier_keyword"}]}))
+    trainer.train(TrainingData(training_examples=[Message("hello", {"intent": "greet"}),
+                                                  Message("bye", {"intent": "goodbye"})]))
+    model_dir = trainer.persist(tmpdir.strpath, project_name="project")
+    monkeypatch.setattr(Project, "warm_up_texts", 2)
+
+    router = BFDataRouter(tmpdir.strpath)
+    router.project_store["project"].load_model()
+
+    warm_up_seconds = router.get_status()["warm_up_seconds"]["project"]
+    assert list(warm_up_seconds) == [os.path.basename(model_dir)]
+    assert warm_up_seconds[os.path.basename(model_dir)] >= 0
@@ -3,7 +3,9 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from nlu.components.botfront.entity_synonyms_endpoints import EntitySynonymBegin, EntitySynonymEnd
+from nlu.components.botfront.entity_synonyms_endpoints import (
+    CompactEntitySynonymMapper, EntitySynonymBegin, EntitySynonymEnd)
+from nlu.components.botfront.synonym_store import SynonymStore, load_synonyms, write_synonyms
 from rasa_nlu.training_data.message import Message
 
 from pytest import raises
@@ -236,3 +238,102 @@ def test_entity_synonyms_substitute_and_replace_w_insertions():
         assert raises(KeyError, lambda x: print(x["literal"]), entity)
         assert entity["start"] == initial["start"]
         assert entity["end"] == initial["end"]
+
+
+def test_entity_synonyms_replace_removed_entity():
+    text_initial = "Looking for a chines restaurant in New York"
+    example = Message(text=text_initial, data={
+        "entities": [{
+            "entity": "type",
+            "value": "chines",
+            "start": 14,
+            "end": 20
+        }, {
+            "entity": "city",
+            "value": "New York",
+            "start": 35,
+            "end": 43
+        }]
+    })
+    ent_synonyms = {"chines": "chinese", "new york": "NYC"}
+    EntitySynonymBegin(synonyms=ent_synonyms).process(example)
+    assert example.text == "Looking for a chinese restaurant in NYC"
+
+    # a component between the two removes an entity
+    example.set("entities", [e for e in example.get("entities") if e["entity"] == "city"])
+    EntitySynonymEnd().process(example)
+
+    assert example.text == text_initial
+    assert example.get("entities")[0]["start"] == 35
+    assert example.get("entities")[0]["end"] == 43
+
+
+def test_synonym_store(tmpdir):
+    synonyms = {"nyc": "New York City", "big apple": "New York City", "montréal": "Montreal", "": "empty"}
+    path = tmpdir.join("entity_synonyms.bin").strpath
+    write_synonyms(path, synonyms)
+
+    store = SynonymStore(path)
+    assert len(store) == 4
+    assert dict(store.items()) == synonyms
+    assert store["montréal"] == "Montreal"
+    assert "nyc" in store and "ny" not in store and "nycc" not in store and 3 not in store
+    assert store.get("zurich") is None
+    with raises(KeyError):
+        store["zurich"]
+
+
+def test_synonym_store_shared(tmpdir):
+    write_synonyms(tmpdir.join("a.bin").strpath, {"nyc": "New York City"})
+    write_synonyms(tmpdir.join("b.bin").strpath, {"nyc": "New York City"})
+    write_synonyms(tmpdir.join("c.bin").strpath, {"nyc": "New York"})
+
+    store = load_synonyms(tmpdir.join("a.bin").strpath)
+    assert load_synonyms(tmpdir.join("b.bin").strpath) is store
+    assert load_synonyms(tmpdir.join("c.bin").strpath) is not store
+
+
+def test_compact_mapper_persist_update_and_reload(tmpdir, component_metadata):
+    model_dir = tmpdir.strpath
+    mapper = CompactEntitySynonymMapper(synonyms={"chines": "chinese", "nyc": "New York City"})
+    meta = mapper.persist(model_dir)
+    loaded = CompactEntitySynonymMapper.load(model_dir, component_metadata(meta))
+    assert isinstance(loaded.synonyms, SynonymStore)
+
+    entities = [{"entity": "city", "value": "NYC", "start": 0, "end": 3}]
+    loaded.replace_synonyms(entities)
+    assert entities[0]["value"] == "New York City"
+
+    assert loaded.update_synonyms(model_dir, add={"Big Apple": "New York City"}, remove=["chines"]) == 2
+    assert dict(loaded.synonyms.items()) == {"big apple": "New York City", "nyc": "New York City"}
+    assert dict(CompactEntitySynonymMapper.load(model_dir, component_metadata(meta)).synonyms.items()) == \
+        dict(loaded.synonyms.items())
+
+    write_synonyms(tmpdir.join("compact_entity_synonyms.bin").strpath, {"nyc": "New York"})
+    assert loaded.reload_synonyms(model_dir) == 1
+    assert loaded.synonyms["nyc"] == "New York"
+
+
+def test_compact_mapper_loads_json_synonyms(tmpdir, component_metadata):
+    tmpdir.join("entity_synonyms.json").write('{"nyc": "New York City"}')
+    meta = component_metadata({"synonyms_file": "entity_synonyms.json"})
+    loaded = CompactEntitySynonymMapper.load(tmpdir.strpath, meta)
+    assert loaded.synonyms == {"nyc": "New York City"}
+
+    # updates go to the file referenced by the metadata
+    assert loaded.update_synonyms(tmpdir.strpath, add={"big apple": "New York City"}) == 2
+    assert CompactEntitySynonymMapper.load(tmpdir.strpath, meta).synonyms == loaded.synonyms
+
+    tmpdir.join("entity_synonyms.json").write('{"nyc": "New York"}')
+    assert loaded.reload_synonyms(tmpdir.strpath) == 1
+    assert loaded.synonyms == {"nyc": "New York"}
+
+
+def test_mappers_persisted_to_their_own_file(tmpdir, component_metadata):
+    begin = EntitySynonymBegin(synonyms={"nyc": "New York City"})
+    mapper = CompactEntitySynonymMapper(synonyms={"nyc": "NYC"})
+    begin_meta, mapper_meta = begin.persist(tmpdir.strpath), mapper.persist(tmpdir.strpath)
+    assert begin_meta != mapper_meta
+
+    assert EntitySynonymBegin.load(tmpdir.strpath, component_metadata(begin_meta)).synonyms["nyc"] == "New York City"
+    assert CompactEntitySynonymMapper.load(tmpdir.strpath, component_metadata(mapper_meta)).synonyms["nyc"] == "NYC"